@@ -0,0 +1,43 @@
+import threading
+import traceback
+from collections import namedtuple
+
+
+# Mudanças publicadas pela Biblioteca depois que a escrita é confirmada
+MaterialAdicionado = namedtuple('MaterialAdicionado', 'material_id')
+MateriaisAdicionados = namedtuple('MateriaisAdicionados', 'primeiro_id ultimo_id')
+MaterialRemovido = namedtuple('MaterialRemovido', 'material_id')
+EmprestimoAberto = namedtuple('EmprestimoAberto', 'usuario_id material_id')
+EmprestimoFechado = namedtuple('EmprestimoFechado', 'emprestimo_id usuario_id material_id')
+ReservaAlterada = namedtuple('ReservaAlterada', 'usuario_id material_id')
+AvaliacaoAlterada = namedtuple('AvaliacaoAlterada', 'usuario_id material_id')
+ResenhaAlterada = namedtuple('ResenhaAlterada', 'usuario_id material_id')
+UsuarioRemovido = namedtuple('UsuarioRemovido', 'usuario_id')
+
+
+class BarramentoEventos:
+    # Entrega cada evento, na thread que o publicou, a quem assinou o tipo dele (ou todos,
+    # com tipos=None). Um assinante com erro não impede os demais nem desfaz a escrita.
+    def __init__(self):
+        self._assinaturas = []
+        self._trava = threading.Lock()
+
+    def assinar(self, callback, tipos=None):
+        with self._trava:
+            self._assinaturas.append((callback, tuple(tipos) if tipos else None))
+
+    def cancelar_assinatura(self, callback):
+        with self._trava:
+            self._assinaturas = [(c, tipos) for c, tipos in self._assinaturas if c != callback]
+
+    def publicar(self, evento):
+        with self._trava:
+            assinaturas = list(self._assinaturas)
+        for callback, tipos in assinaturas:
+            if tipos is not None and not isinstance(evento, tipos):
+                continue
+            try:
+                callback(evento)
+            except Exception:
+                print(f"Erro ao entregar o evento {type(evento).__name__}:")
+                traceback.print_exc()
@@ -1,77 +1,508 @@
+import re
+import json
+import base64
 import sqlite3
-import bcrypt 
+import time
+import random
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from MaterialBibliografico import Livro, Apostila, Ebook, Revista, Resenha, Trabalho
+from dados import normalizar_texto, indexar_busca_intervalo
+from PoolConexoes import PoolConexoes, abrir_conexao, banco_em_arquivo, verificar_perfil
+from BarramentoEventos import (BarramentoEventos, MaterialAdicionado, MateriaisAdicionados, MaterialRemovido,
+                               EmprestimoAberto, EmprestimoFechado, ReservaAlterada, AvaliacaoAlterada,
+                               ResenhaAlterada, UsuarioRemovido)
+
+
+# categoria -> (junção da tabela do subtipo, colunas que ela fornece). Resenha e trabalho
+# não têm colunas próprias e por isso não aparecem aqui.
+SUBTIPOS_MATERIAL = {
+    'livro': ("LEFT JOIN livro l ON mb.id = l.id",
+              ('l.genero AS livro_genero', 'l.movimento AS livro_movimento', 'l.editora AS livro_editora')),
+    'apostila': ("LEFT JOIN apostila a ON mb.id = a.id",
+                 ('a.turma AS apostila_turma', 'a.disciplina AS apostila_disciplina')),
+    'ebook': ("LEFT JOIN ebook e ON mb.id = e.id",
+              ('e.genero AS ebook_genero', 'e.movimento AS ebook_movimento', 'e.url AS ebook_url')),
+    'revista': ("LEFT JOIN revista r ON mb.id = r.id",
+                ('r.editora AS revista_editora',)),
+}
+
+
+# Status a partir dos contadores de material_status (apelido ms); sem linha, o material está disponível
+SQL_STATUS_MATERIAL = """CASE
+                WHEN ms.emprestimos_abertos > 0 THEN 'Emprestado'
+                WHEN ms.reservas_pendentes > 0 THEN 'Reservado'
+                ELSE 'Disponível'
+            END"""
+
+
+def _consulta_materiais(categorias=None, com_status=False):
+    # Monta o SELECT do acervo juntando só as tabelas dos subtipos pedidos (todos quando
+    # categorias é None). As colunas dos demais subtipos vêm como NULL, então as linhas têm
+    # sempre as mesmas chaves. A nota média vem do resumo de avaliações e, com com_status,
+    # o status vem de material_status.
+    colunas = ['mb.id', 'mb.autor', 'mb.titulo', 'mb.ano', 'mb.categoria']
+    juncoes = []
+    for categoria, (juncao, colunas_subtipo) in SUBTIPOS_MATERIAL.items():
+        if categorias is None or categoria in categorias:
+            juncoes.append(juncao)
+            colunas.extend(colunas_subtipo)
+        else:
+            colunas.extend('NULL AS ' + coluna.split(' AS ')[1] for coluna in colunas_subtipo)
+    colunas.append('ar.soma_notas / ar.total_avaliacoes AS nota_media')
+    juncoes.append("LEFT JOIN avaliacao_resumo ar ON mb.id = ar.material_id")
+    if com_status:
+        colunas.append(SQL_STATUS_MATERIAL + ' AS status')
+        juncoes.append("LEFT JOIN material_status ms ON mb.id = ms.material_id")
+    juncoes = '\n        '.join(juncoes)
+    return f"""
+        SELECT {', '.join(colunas)}
+        FROM material_bibliografico mb
+        {juncoes}
+    """
+
+
+class _ConexaoDaThread:
+    # Conexão de leitura do pool vinculada a uma thread por conexao(), com o cursor dela. Se
+    # a thread terminar sem liberar_conexao(), a conexão volta ao pool quando o vínculo é
+    # coletado junto com os dados locais da thread.
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = pool.obter()
+        self.cursor = self.conn.cursor()
+
+    def devolver(self):
+        if self.conn is not None:
+            conn, self.conn, self.cursor = self.conn, None, None
+            self.pool.devolver(conn)
+
+    def __del__(self):
+        try:
+            self.devolver()
+        except Exception:
+            pass
+
+
+def _hash_senha(senha):
+    # bcrypt é importado só quando uma senha é tratada: exportador, importador e a abertura
+    # da interface não pagam a carga da extensão
+    import bcrypt
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _conferir_senha(senha, senha_hash):
+    import bcrypt
+    return bcrypt.checkpw(senha.encode('utf-8'), senha_hash.encode('utf-8'))
+
+
+def _banco_ocupado(erro):
+    # SQLITE_BUSY (outro processo com o banco travado) ou SQLITE_LOCKED (conflito na mesma conexão)
+    codigo = getattr(erro, 'sqlite_errorcode', None)
+    if codigo is not None:
+        return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return 'locked' in str(erro) or 'busy' in str(erro)
+
+
+class _Escritor:
+    # A única conexão que grava. A trava serializa as escritas entre threads e fica com a
+    # thread durante toda a transacao(), então lastrowid e o nível da transação são dela.
+    def __init__(self, db_name, perfil):
+        self.conn = abrir_conexao(db_name, perfil, nome='escritor')
+        self.cursor = self.conn.cursor()
+        self.trava = threading.RLock()
+        self.nivel_transacao = 0
+        # Eventos das escritas da transação aberta, publicados só depois do COMMIT
+        self.eventos_pendentes = []
+        self.metricas = {'escritas': 0, 'transacoes': 0, 'esperas': 0, 'segundos_espera': 0.0,
+                         'retentativas': 0, 'segundos_ocupado': 0.0, 'desistencias': 0}
 
 
 class Biblioteca:
-    def __init__(self, db_name='Biblioteca.db'):
+    TAMANHO_LOTE_IDS = 500
+    TAMANHO_LOTE_ITERACAO = 1000
+    TAMANHO_POOL = 4
+    # Banco ocupado por outro processo: até TENTATIVAS_OCUPADO tentativas, com pausas aleatórias
+    # de até ESPERA_INICIAL_OCUPADO segundos, dobrando a cada vez até ESPERA_MAXIMA_OCUPADO.
+    # Cada tentativa ainda espera até busy_timeout (perfil da conexão) dentro do SQLite.
+    TENTATIVAS_OCUPADO = 5
+    ESPERA_INICIAL_OCUPADO = 0.05
+    ESPERA_MAXIMA_OCUPADO = 2.0
+
+    # Material com os campos de todos os subtipos e a nota média
+    CONSULTA_ACERVO = _consulta_materiais()
+
+    def __init__(self, db_name='Biblioteca.db', tamanho_pool=None, perfil='desk'):
+        # perfil: configuração das conexões (ver PoolConexoes.PERFIS)
         self.db_name = db_name
-        self.conn = None
-        self.cursor = None
+        self.tamanho_pool = tamanho_pool or self.TAMANHO_POOL
+        self.perfil = perfil
+        # Leituras usam conexões somente leitura do pool, emprestadas só durante cada consulta
+        # (ou durante um bloco conexao()); escritas e transacao() passam pela conexão de
+        # escrita. Em WAL as leituras seguem em paralelo enquanto a escrita grava.
+        # Um banco em memória (ou aberto por URI file:) não pode ser reaberto somente leitura:
+        # aí não há pool e as leituras também usam a conexão de escrita, esperando a vez.
+        self._leitores_separados = banco_em_arquivo(db_name)
+        self._escritor = None
+        self._pool = None
+        self._local = threading.local()
+        # Mudanças confirmadas (ver BarramentoEventos); as telas assinam para se atualizar
+        self.eventos = BarramentoEventos()
         self._connect()
         print("Conexão com o banco de dados estabelecida.")
-        
+
+    def _escrevendo(self):
+        return getattr(self._local, 'escrevendo', 0) > 0
+
+    @property
+    def conn(self):
+        # Conexão em uso pela thread: a de escrita durante escritas e transações, senão a de
+        # leitura vinculada por conexao() (None fora dela)
+        if self._escrevendo():
+            return self._escritor.conn
+        vinculo = getattr(self._local, 'vinculo', None)
+        return vinculo.conn if vinculo else None
+
+    @property
+    def cursor(self):
+        if self._escrevendo():
+            return self._escritor.cursor
+        vinculo = getattr(self._local, 'vinculo', None)
+        return vinculo.cursor if vinculo else None
+
+    @property
+    def _nivel_transacao(self):
+        return self._escritor.nivel_transacao
+
+    @_nivel_transacao.setter
+    def _nivel_transacao(self, nivel):
+        self._escritor.nivel_transacao = nivel
+
     def _connect(self):
         try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.conn.row_factory = sqlite3.Row
-            self.cursor = self.conn.cursor()
-            # Ativar chaves estrangeiras
-            self.cursor.execute("PRAGMA foreign_keys = ON")
+            # A conexão de escrita abre primeiro: é ela que cria o arquivo e ativa o WAL
+            # que as conexões somente leitura precisam encontrar
+            if self._escritor is None:
+                self._escritor = _Escritor(self.db_name, self.perfil)
+            if self._pool is None and self._leitores_separados:
+                self._pool = PoolConexoes(self.db_name, self.tamanho_pool, perfil=self.perfil,
+                                          somente_leitura=True)
         except sqlite3.Error as e:
             print(f"Erro ao conectar ao banco de dados: {e}")
-            self.conn = None
-            self.cursor = None
-    
+
+    def _pool_leitura(self):
+        if self._pool is None:
+            self._connect()
+            if self._pool is None:
+                raise sqlite3.OperationalError("Sem conexão com o banco de dados.")
+        return self._pool
+
+    @contextmanager
+    def _leitor(self):
+        # Conexão de leitura da thread: a vinculada por conexao() ou uma do pool emprestada só
+        # durante o bloco, para que threads que leem sem conexao() não prendam conexões.
+        # Com o pool esgotado, obter() levanta OperationalError depois do timeout.
+        vinculo = getattr(self._local, 'vinculo', None)
+        if vinculo:
+            yield vinculo.conn
+            return
+        if not self._leitores_separados:
+            with self._escrita() as escritor:
+                yield escritor.conn
+            return
+        pool = self._pool_leitura()
+        conn = pool.obter()
+        rastreio = getattr(self._local, 'rastreio', None)
+        if rastreio:
+            conn.set_trace_callback(rastreio)
+        try:
+            yield conn
+        finally:
+            if rastreio:
+                conn.set_trace_callback(None)
+            pool.devolver(conn)
+
+    @contextmanager
+    def _leitura(self):
+        # Conexão para uma consulta: a de escrita durante escritas e transações (enxerga o que
+        # ainda não foi confirmado), senão a de leitura
+        if self._escrevendo():
+            yield self._escritor.conn
+            return
+        with self._leitor() as conn:
+            yield conn
+
+    @contextmanager
+    def _escrita(self):
+        # Passa a thread para a conexão de escrita durante o bloco, esperando a vez se
+        # outra thread estiver escrevendo
+        if self._escritor is None:
+            self._connect()
+        escritor = self._escritor
+        if not escritor.trava.acquire(blocking=False):
+            inicio = time.perf_counter()
+            escritor.trava.acquire()
+            escritor.metricas['esperas'] += 1
+            escritor.metricas['segundos_espera'] += time.perf_counter() - inicio
+        self._local.escrevendo = getattr(self._local, 'escrevendo', 0) + 1
+        try:
+            yield escritor
+        finally:
+            self._local.escrevendo -= 1
+            escritor.trava.release()
+
+    def _com_retentativa(self, operacao, *args):
+        # Repete a operação de escrita enquanto o banco estiver ocupado, com espera exponencial
+        # e aleatória (jitter) entre as tentativas; outros erros e a última falha são relançados
+        metricas = self._escritor.metricas
+        espera = self.ESPERA_INICIAL_OCUPADO
+        for tentativa in range(1, self.TENTATIVAS_OCUPADO + 1):
+            inicio = time.perf_counter()
+            try:
+                return operacao(*args)
+            except sqlite3.OperationalError as e:
+                if not _banco_ocupado(e):
+                    raise
+                metricas['segundos_ocupado'] += time.perf_counter() - inicio
+                if tentativa == self.TENTATIVAS_OCUPADO:
+                    metricas['desistencias'] += 1
+                    raise
+                pausa = random.uniform(0, espera)
+                metricas['retentativas'] += 1
+                metricas['segundos_ocupado'] += pausa
+                time.sleep(pausa)
+                espera = min(espera * 2, self.ESPERA_MAXIMA_OCUPADO)
+
+    def verificar_perfil(self):
+        # {conexão: {pragma: (esperado, atual)}} do que não foi aplicado nas conexões de escrita
+        # e de leitura da thread; vazio se tudo confere
+        divergencias = {}
+        with self._escrita() as escritor:
+            diferencas = verificar_perfil(escritor.conn, self.perfil)
+            if diferencas:
+                divergencias[escritor.conn.nome] = diferencas
+        if self._leitores_separados:
+            with self._leitor() as leitura:
+                diferencas = self._pool.verificar_perfil(leitura)
+                if diferencas:
+                    divergencias[leitura.nome] = diferencas
+        return divergencias
+
+    def metricas_conexoes(self):
+        # Contadores por conexão: comandos, tempo e erros de cada uma, esperas pela escrita
+        # e pelo pool de leitura
+        escritor = self._escritor
+        metricas = {}
+        if escritor:
+            metricas['escrita'] = dict(escritor.metricas, conexao=dict(escritor.conn.metricas))
+        if self._pool:
+            metricas['leitura'] = self._pool.metricas()
+        return metricas
+
+    def rastrear_consultas(self, callback):
+        # Repassa cada comando SQL enviado pela conexão de escrita e pelas de leitura usadas
+        # pela thread (None desliga)
+        if self._escritor is None:
+            self._connect()
+        self._escritor.conn.set_trace_callback(callback)
+        self._local.rastreio = callback
+        vinculo = getattr(self._local, 'vinculo', None)
+        if vinculo:
+            vinculo.conn.set_trace_callback(callback)
+
+    def liberar_conexao(self):
+        # Devolve ao pool a conexão de leitura da thread atual (ex.: no fim de uma tarefa em
+        # segundo plano); o próximo acesso da thread obtém outra
+        vinculo = getattr(self._local, 'vinculo', None)
+        if vinculo:
+            if getattr(self._local, 'rastreio', None):
+                vinculo.conn.set_trace_callback(None)
+            vinculo.devolver()
+            self._local.vinculo = None
+
+    @contextmanager
+    def conexao(self):
+        # Vincula uma conexão de leitura do pool à thread atual só durante o bloco:
+        #     with biblioteca.conexao():
+        #         biblioteca.listar_acervo()
+        # Com o pool esgotado, levanta OperationalError depois do timeout.
+        # Sem pool (banco em memória) cada leitura do bloco usa a conexão de escrita.
+        ja_vinculada = getattr(self._local, 'vinculo', None) is not None or not self._leitores_separados
+        if not ja_vinculada:
+            self._local.vinculo = _ConexaoDaThread(self._pool_leitura())
+            rastreio = getattr(self._local, 'rastreio', None)
+            if rastreio:
+                self._local.vinculo.conn.set_trace_callback(rastreio)
+        try:
+            yield self
+        finally:
+            if not ja_vinculada:
+                self.liberar_conexao()
+
     def close(self):
-        if self.conn:
-            self.conn.close()
-            self.conn = None
-            self.cursor = None
+        self.liberar_conexao()
+        if self._pool:
+            self._pool.fechar()
+            self._pool = None
+        if self._escritor:
+            self._escritor.conn.close()
+            self._escritor = None
     
     def execute_query(self, query, params=()):
-        if not self.conn:
+        if self._escritor is None:
             self._connect()
-            if not self.conn:
+            if self._escritor is None:
                 return None
         
-        try:
-            self.cursor.execute(query, params)
-            self.conn.commit()
-            return True
-        except sqlite3.Error as e:
-            print(f"Erro ao executar a query: {e}")
-            self.conn.rollback()
-            return False
+        with self._escrita() as escritor:
+            try:
+                self._com_retentativa(escritor.cursor.execute, query, params)
+                escritor.metricas['escritas'] += 1
+                return True
+            except sqlite3.Error as e:
+                print(f"Erro ao executar a query: {e}")
+                # Dentro de transacao() o comando que falhou não tem efeito; quem decide
+                # desfazer o restante é o bloco with (levantando uma exceção)
+                return False
+
+    def _alterar(self, query, params=()):
+        # execute_query para UPDATE/DELETE: número de linhas alteradas (0 se o WHERE não casou
+        # com nenhuma), lido sob a mesma trava de escrita, ou None se o comando falhou
+        with self._escrita() as escritor:
+            if not self.execute_query(query, params):
+                return None
+            return escritor.cursor.rowcount
+
+    def _publicar(self, evento):
+        # Dentro de transacao() o evento espera o COMMIT e é descartado no ROLLBACK;
+        # fora dela a escrita já foi confirmada
+        if self._escrevendo() and self._nivel_transacao > 0:
+            self._escritor.eventos_pendentes.append(evento)
+        else:
+            self.eventos.publicar(evento)
+
+    @contextmanager
+    def transacao(self):
+        # Agrupa várias chamadas da Biblioteca em um único commit:
+        #     with biblioteca.transacao():
+        #         biblioteca.registrar_emprestimo(...)
+        #         biblioteca.cancelar_reserva(...)
+        # Uma exceção dentro do bloco desfaz tudo. Blocos aninhados usam SAVEPOINT,
+        # e uma exceção no bloco interno desfaz apenas ele. Dentro do bloco todas as
+        # consultas usam a conexão de escrita e enxergam o que ainda não foi confirmado.
+        eventos = []
+        with self._escrita() as escritor:
+            nivel = self._nivel_transacao
+            savepoint = f"biblioteca_sp{nivel}"
+            # Eventos anteriores a este bloco; os dele saem da lista se ele for desfeito
+            marca = len(escritor.eventos_pendentes)
+            if nivel == 0:
+                self._com_retentativa(escritor.conn.execute, "BEGIN IMMEDIATE")
+            else:
+                escritor.conn.execute(f"SAVEPOINT {savepoint}")
+
+            self._nivel_transacao += 1
+            try:
+                yield self
+            except BaseException:
+                self._nivel_transacao -= 1
+                del escritor.eventos_pendentes[marca:]
+                if nivel == 0:
+                    escritor.conn.execute("ROLLBACK")
+                else:
+                    escritor.conn.execute(f"ROLLBACK TO {savepoint}")
+                    escritor.conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                self._nivel_transacao -= 1
+                if nivel == 0:
+                    try:
+                        self._com_retentativa(escritor.conn.execute, "COMMIT")
+                    except sqlite3.Error:
+                        # Sem o commit, nada do bloco é gravado
+                        del escritor.eventos_pendentes[marca:]
+                        escritor.conn.execute("ROLLBACK")
+                        raise
+                    escritor.metricas['transacoes'] += 1
+                    eventos, escritor.eventos_pendentes = escritor.eventos_pendentes, []
+                else:
+                    escritor.conn.execute(f"RELEASE {savepoint}")
+        # Fora da trava de escrita: quem assina pode consultar o banco
+        for evento in eventos:
+            self.eventos.publicar(evento)
     
     def _fetch_one(self, query, params=()):
-        if not self.conn:
-            self._connect()
         try:
-            self.cursor.execute(query, params)
-            return self.cursor.fetchone()
+            with self._leitura() as conn:
+                return conn.execute(query, params).fetchone()
         except sqlite3.Error as e:
             print(f"Erro ao buscar um registro: {e}")
             return None
         
     def _fetch_all(self, query, params=()):
-        if not self.conn:
-            self._connect()
         try:
-            self.cursor.execute(query, params)
-            return self.cursor.fetchall()
+            with self._leitura() as conn:
+                return conn.execute(query, params).fetchall()
         except sqlite3.Error as e:
             print(f"Erro ao buscar registros: {e}")
             return None
 
+    def _iterar(self, query, params=(), tamanho_lote=None):
+        # Gera as linhas aos poucos, lendo tamanho_lote por vez com fetchmany. Usa um cursor
+        # próprio para não ser afetado por outras consultas feitas durante a iteração;
+        # interromper o laço (break, close()) fecha o cursor sem ler o restante. Fora de
+        # conexao() a conexão de leitura fica emprestada até o fim da iteração.
+        tamanho_lote = tamanho_lote or self.TAMANHO_LOTE_ITERACAO
+        try:
+            with self._leitura() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(query, params)
+                    while True:
+                        bloco = cursor.fetchmany(tamanho_lote)
+                        if not bloco:
+                            break
+                        yield from bloco
+                finally:
+                    cursor.close()
+        except sqlite3.Error as e:
+            print(f"Erro ao iterar registros: {e}")
+
+    def _paginar(self, montar_consulta, chave, tamanho_chave, tamanho_pagina, token):
+        # Paginação por chave (keyset): o token guarda a chave de ordenação da última linha
+        # entregue (lista de tamanho_chave valores) e a próxima página começa logo depois dela
+        # no índice, sem OFFSET. Retorna (registros, próximo token), com token None na última
+        # página, ou None se o token ou o tamanho da página forem inválidos.
+        if not isinstance(tamanho_pagina, int) or tamanho_pagina < 1:
+            print(f"Tamanho de página inválido: {tamanho_pagina}")
+            return None
+        posicao = None
+        if token:
+            try:
+                posicao = json.loads(base64.urlsafe_b64decode(token))
+            except (ValueError, TypeError):
+                posicao = None
+            # JSON válido mas sem o formato da chave ({}, 0, "") também é rejeitado
+            if not isinstance(posicao, list) or len(posicao) != tamanho_chave:
+                print("Token de paginação inválido.")
+                return None
+        query, params = montar_consulta(posicao)
+        registros = self._fetch_all(query + " LIMIT ?", params + (tamanho_pagina + 1,))
+        if registros is None:
+            return None
+        proximo_token = None
+        if len(registros) > tamanho_pagina:
+            registros = registros[:tamanho_pagina]
+            proximo_token = base64.urlsafe_b64encode(json.dumps(chave(registros[-1])).encode()).decode()
+        return registros, proximo_token
+
     
 
 
     # Métodos para usuários
     def cadastrar_usuario(self, nome, email, senha):
         try: 
-            senha_hash = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            senha_hash = _hash_senha(senha)
             query = 'INSERT INTO usuario (nome, email, senha_hash) VALUES (?, ?, ?)'
 
             if self.execute_query(query, (nome, email, senha_hash)):
@@ -99,7 +530,7 @@ class Biblioteca:
         usuario_id = resultado['id']
         senha_hash = resultado['senha_hash']
 
-        if bcrypt.checkpw(senha.encode('utf-8'), senha_hash.encode('utf-8')):
+        if _conferir_senha(senha, senha_hash):
             print(f"Usuário '{email}' logado com sucesso.")
             return usuario_id
         else:
@@ -115,7 +546,7 @@ class Biblioteca:
             return False
         
         usuario_id = resultado['id']
-        senha_hash = bcrypt.hashpw(nova_senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        senha_hash = _hash_senha(nova_senha)
         
         query_update = 'UPDATE usuario SET senha_hash = ? WHERE id = ?'
         return self.execute_query(query_update, (senha_hash, usuario_id))
@@ -135,7 +566,7 @@ class Biblioteca:
             updates.append("email = ?")
             params.append(email)
         if senha:
-            senha_hash = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            senha_hash = _hash_senha(senha)
             updates.append("senha_hash = ?")
             params.append(senha_hash)
         
@@ -151,178 +582,430 @@ class Biblioteca:
             return True 
         return False
     
+    CONSULTA_USUARIOS = 'SELECT id, nome, email FROM usuario ORDER BY nome'
+
     def listar_usuarios(self):
-        query = 'SELECT id, nome, email FROM usuario ORDER BY nome'
-        return self._fetch_all(query)
+        return self._fetch_all(self.CONSULTA_USUARIOS)
+
+    def iterar_usuarios(self, tamanho_lote=None):
+        return self._iterar(self.CONSULTA_USUARIOS, (), tamanho_lote)
+
+    def paginar_usuarios(self, tamanho_pagina=50, token=None):
+        def montar_consulta(posicao):
+            query = 'SELECT id, nome, email FROM usuario'
+            params = ()
+            if posicao:
+                query += ' WHERE (nome, id) > (?, ?)'
+                params = tuple(posicao)
+            return query + ' ORDER BY nome, id', params
+        return self._paginar(montar_consulta, lambda row: [row['nome'], row['id']], 2,
+                             tamanho_pagina, token)
     
     
 
     def remover_usuario(self, user_id):
         query = 'DELETE FROM usuario WHERE id = ?'
-        return self.execute_query(query, (user_id,))
+        alteradas = self._alterar(query, (user_id,))
+        if alteradas is None:
+            return False
+        if alteradas:
+            self._publicar(UsuarioRemovido(user_id))
+        return True
     
 
 
     # Métodos para materiais
     def adicionar_material(self, material):
         try: 
-            query_material = '''
-            INSERT INTO material_bibliografico (usuario_id, autor, titulo, ano, categoria)
-            VALUES (?, ?, ?, ?, ?)'''
+            # Material e subtipo entram juntos: se o segundo INSERT falhar, o primeiro é desfeito
+            with self.transacao():
+                query_material = '''
+                INSERT INTO material_bibliografico (usuario_id, autor, titulo, ano, categoria,
+                                                    titulo_normalizado, autor_normalizado)
+                VALUES (?, ?, ?, ?, ?, ?, ?)'''
 
-            categoria = type(material).__name__.lower()
-            
-            if not self.execute_query(query_material, 
-                                    (material.usuario_id, material.autor, 
-                                     material.titulo, material.ano, categoria)):
-                raise Exception("Erro ao adicionar material bibliográfico.")
+                categoria = type(material).__name__.lower()
             
-            material_id = self.cursor.lastrowid
-
-            if isinstance(material, Livro):
-                query_especifico = '''
-                INSERT INTO livro (id, genero, movimento, editora)
-                VALUES (?, ?, ?, ?)'''
-                params_especifico = (material_id, material.genero, 
-                                    material.movimento, material.editora)
-
-            elif isinstance(material, Apostila):
-                query_especifico = '''
-                INSERT INTO apostila (id, turma, disciplina)
-                VALUES (?, ?, ?)'''
-                params_especifico = (material_id, material.turma, material.disciplina)
-
-            elif isinstance(material, Ebook):
-                query_especifico = '''
-                INSERT INTO ebook (id, genero, movimento, url)
-                VALUES (?, ?, ?, ?)'''
-                params_especifico = (material_id, material.genero, 
-                                    material.movimento, material.url)
-
-            elif isinstance(material, Revista):
-                query_especifico = '''
-                INSERT INTO revista (id, editora)
-                VALUES (?, ?)'''
-                params_especifico = (material_id, material.editora)
-                
-            elif isinstance(material, Resenha):
-                query_especifico = '''
-                INSERT INTO resenha_material (id)
-                VALUES (?)'''
-                params_especifico = (material_id,)
-                
-            elif isinstance(material, Trabalho):
-                query_especifico = '''
-                INSERT INTO trabalho (id)
-                VALUES (?)'''
-                params_especifico = (material_id,)
+                # A normalização para busca é feita uma vez, na escrita
+                if not self.execute_query(query_material, 
+                                        (material.usuario_id, material.autor, 
+                                         material.titulo, material.ano, categoria,
+                                         normalizar_texto(material.titulo),
+                                         normalizar_texto(material.autor))):
+                    raise Exception("Erro ao adicionar material bibliográfico.")
             
-            else:
-                raise ValueError("Tipo de material não reconhecido.")
+                material_id = self.cursor.lastrowid
+                query_especifico, params_especifico = self._insercao_subtipo(material, material_id)
 
-            if self.execute_query(query_especifico, params_especifico):
-                print(f"Material '{material.titulo}' adicionado com sucesso.")
-                return material_id
-            else:
-                self.execute_query("DELETE FROM material_bibliografico WHERE id = ?", (material_id,))
-                raise Exception("Erro ao adicionar material específico.")
+                if not self.execute_query(query_especifico, params_especifico):
+                    raise Exception("Erro ao adicionar material específico.")
+                self._publicar(MaterialAdicionado(material_id))
+
+            print(f"Material '{material.titulo}' adicionado com sucesso.")
+            return material_id
             
         except Exception as e:
             print(f"Erro ao adicionar o material: {e}")
             return None
 
-    def listar_acervo(self, tipo=None):
-        query = """
-        SELECT 
-            mb.id, mb.autor, mb.titulo, mb.ano, mb.categoria,
-            l.genero AS livro_genero, l.movimento AS livro_movimento, l.editora AS livro_editora,
-            a.turma AS apostila_turma, a.disciplina AS apostila_disciplina,
-            e.genero AS ebook_genero, e.movimento AS ebook_movimento, e.url AS ebook_url,
-            r.editora AS revista_editora
-        FROM material_bibliografico mb
-        LEFT JOIN livro l ON mb.id = l.id
-        LEFT JOIN apostila a ON mb.id = a.id
-        LEFT JOIN ebook e ON mb.id = e.id
-        LEFT JOIN revista r ON mb.id = r.id
-        LEFT JOIN resenha_material rm ON mb.id = rm.id
-        LEFT JOIN trabalho t ON mb.id = t.id
-        """
+    def adicionar_materiais_lote(self, materiais, tamanho_lote=10000):
+        # Insere muitos materiais em uma única transação, com executemany por tabela.
+        # Retorna os ids na mesma ordem de entrada, ou None se nada foi gravado.
+        query_material = '''
+        INSERT INTO material_bibliografico (id, usuario_id, autor, titulo, ano, categoria,
+                                            titulo_normalizado, autor_normalizado)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+        ids = []
+        try:
+            with self.transacao():
+                # Com a escrita bloqueada pela transação, os próximos ids podem ser
+                # atribuídos aqui, sem depender de lastrowid a cada linha
+                proximo_id = self._fetch_one("""
+                SELECT MAX(
+                    COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'material_bibliografico'), 0),
+                    COALESCE((SELECT MAX(id) FROM material_bibliografico), 0)
+                ) + 1 AS proximo_id
+                """)['proximo_id']
+                primeiro_id = proximo_id
+
+                # Os gatilhos de busca ficam suspensos só dentro desta transação;
+                # o intervalo inserido é indexado de uma vez no fim
+                self.cursor.execute("INSERT INTO busca_suspensa (suspensa) VALUES (1)")
+
+                lote = []
+                for material in materiais:
+                    lote.append(material)
+                    if len(lote) >= tamanho_lote:
+                        ids.extend(self._inserir_lote(query_material, lote, proximo_id))
+                        proximo_id += len(lote)
+                        lote = []
+                if lote:
+                    ids.extend(self._inserir_lote(query_material, lote, proximo_id))
+
+                self.cursor.execute("DELETE FROM busca_suspensa")
+                if ids:
+                    indexar_busca_intervalo(self.cursor, primeiro_id, ids[-1])
+                    # Um evento para o intervalo todo, não um por material
+                    self._publicar(MateriaisAdicionados(primeiro_id, ids[-1]))
+
+            print(f"{len(ids)} materiais adicionados em lote.")
+            return ids
+
+        except Exception as e:
+            print(f"Erro ao adicionar materiais em lote: {e}")
+            return None
+
+    def _inserir_lote(self, query_material, lote, primeiro_id):
+        linhas_material = []
+        linhas_subtipo = {}
+        for material_id, material in enumerate(lote, start=primeiro_id):
+            linhas_material.append((material_id, material.usuario_id, material.autor,
+                                    material.titulo, material.ano, type(material).__name__.lower(),
+                                    normalizar_texto(material.titulo), normalizar_texto(material.autor)))
+            query_especifico, params_especifico = self._insercao_subtipo(material, material_id)
+            linhas_subtipo.setdefault(query_especifico, []).append(params_especifico)
+
+        self.conn.executemany(query_material, linhas_material)
+        for query_especifico, linhas in linhas_subtipo.items():
+            self.conn.executemany(query_especifico, linhas)
+        return [linha[0] for linha in linhas_material]
+
+    def _insercao_subtipo(self, material, material_id):
+        if isinstance(material, Livro):
+            query_especifico = '''
+            INSERT INTO livro (id, genero, movimento, editora)
+            VALUES (?, ?, ?, ?)'''
+            params_especifico = (material_id, material.genero, 
+                                material.movimento, material.editora)
+
+        elif isinstance(material, Apostila):
+            query_especifico = '''
+            INSERT INTO apostila (id, turma, disciplina)
+            VALUES (?, ?, ?)'''
+            params_especifico = (material_id, material.turma, material.disciplina)
+
+        elif isinstance(material, Ebook):
+            query_especifico = '''
+            INSERT INTO ebook (id, genero, movimento, url)
+            VALUES (?, ?, ?, ?)'''
+            params_especifico = (material_id, material.genero, 
+                                material.movimento, material.url)
+
+        elif isinstance(material, Revista):
+            query_especifico = '''
+            INSERT INTO revista (id, editora)
+            VALUES (?, ?)'''
+            params_especifico = (material_id, material.editora)
+            
+        elif isinstance(material, Resenha):
+            query_especifico = '''
+            INSERT INTO resenha_material (id)
+            VALUES (?)'''
+            params_especifico = (material_id,)
+            
+        elif isinstance(material, Trabalho):
+            query_especifico = '''
+            INSERT INTO trabalho (id)
+            VALUES (?)'''
+            params_especifico = (material_id,)
+        
+        else:
+            raise ValueError("Tipo de material não reconhecido.")
+
+        return query_especifico, params_especifico
+
+    def _consulta_acervo(self, tipo=None):
+        query = self.CONSULTA_ACERVO
         params = ()
         if tipo:
-            query += " WHERE mb.categoria = ?"
+            query = _consulta_materiais([tipo]) + " WHERE mb.categoria = ?"
             params = (tipo,)
-            
-        materiais_db = self._fetch_all(query, params)
+        query += " ORDER BY mb.id"
+        return query, params
+
+    def listar_acervo(self, tipo=None):
+        materiais_db = self._fetch_all(*self._consulta_acervo(tipo))
         
         acervo = []
         for row in materiais_db:
-            material_info = dict(row)
-            nota_media = self.calcular_nota_media_material(material_info['id'])
-            material_info['nota_media'] = nota_media if nota_media is not None else 0.0
-            acervo.append(material_info)
+            acervo.append(self._material_com_nota(row))
         return acervo
 
+    def iterar_acervo(self, tipo=None, tamanho_lote=None):
+        query, params = self._consulta_acervo(tipo)
+        for row in self._iterar(query, params, tamanho_lote):
+            yield self._material_com_nota(row)
+
+    def paginar_acervo(self, tipo=None, tamanho_pagina=50, token=None):
+        def montar_consulta(posicao):
+            condicoes = []
+            params = ()
+            if tipo:
+                condicoes.append("mb.categoria = ?")
+                params += (tipo,)
+            if posicao:
+                condicoes.append("mb.id > ?")
+                params += tuple(posicao)
+            query = _consulta_materiais([tipo]) if tipo else self.CONSULTA_ACERVO
+            if condicoes:
+                query += " WHERE " + " AND ".join(condicoes)
+            return query + " ORDER BY mb.id", params
+        pagina = self._paginar(montar_consulta, lambda row: [row['id']], 1, tamanho_pagina, token)
+        if pagina is None:
+            return None
+        registros, proximo_token = pagina
+        return [self._material_com_nota(row) for row in registros], proximo_token
+
+    # Colunas pelas quais a tela do acervo pode ordenar -> expressão indexada em SQL
+    ORDENACOES_ACERVO = {
+        'id': 'mb.id',
+        'titulo': 'mb.titulo_normalizado',
+        'autor': 'mb.autor_normalizado',
+        'categoria': 'mb.categoria',
+    }
+
+    def paginar_acervo_com_status(self, filtro=None, ordenar_por='id', decrescente=False,
+                                  tamanho_pagina=200, token=None):
+        # Página enxuta (id, título, autor, categoria, status) para a tabela do acervo.
+        # Filtro por título (FTS) e ordenação ficam no SQL; a chave é (coluna, id).
+        if ordenar_por not in self.ORDENACOES_ACERVO:
+            print(f"Ordenação desconhecida: {ordenar_por}")
+            return None
+        coluna = self.ORDENACOES_ACERVO[ordenar_por]
+        direcao = 'DESC' if decrescente else 'ASC'
+
+        def montar_consulta(posicao):
+            condicoes = []
+            params = ()
+            if filtro is not None:
+                expressao = self._expressao_busca(filtro)
+                if not expressao:
+                    condicoes.append("0")
+                else:
+                    condicoes.append("mb.id IN (SELECT rowid FROM material_busca WHERE material_busca MATCH ?)")
+                    params += (f'titulo : ({expressao})',)
+            operador = '<' if decrescente else '>'
+            if posicao and coluna == 'mb.id':
+                condicoes.append(f"mb.id {operador} ?")
+                params += tuple(posicao)
+            elif posicao:
+                # Títulos/autores inseridos fora da Biblioteca podem ter a coluna normalizada
+                # NULL. No SQLite o NULL é o menor valor: vem primeiro em ASC e, por padrão,
+                # por último em DESC; o ORDER BY abaixo força DESC NULLS FIRST, então nas duas
+                # direções todos os NULL (por id) vêm antes de qualquer valor. A condição
+                # depende disso: de uma chave NULL segue pelos NULL restantes e depois por
+                # todos os não NULL; de uma chave com valor, a comparação de tupla já exclui os
+                # NULL, entregues antes. Tirar o NULLS FIRST pularia os NULL no fim do DESC.
+                valor, ultimo_id = posicao
+                if valor is None:
+                    condicoes.append(f"(({coluna} IS NULL AND mb.id {operador} ?) OR {coluna} IS NOT NULL)")
+                    params += (ultimo_id,)
+                else:
+                    condicoes.append(f"({coluna}, mb.id) {operador} (?, ?)")
+                    params += (valor, ultimo_id)
+            query = f"""
+                SELECT mb.id, mb.titulo, mb.autor, mb.categoria, {coluna} AS ordem,
+                       {SQL_STATUS_MATERIAL} AS status
+                FROM material_bibliografico mb
+                LEFT JOIN material_status ms ON mb.id = ms.material_id
+            """
+            if condicoes:
+                query += " WHERE " + " AND ".join(condicoes)
+            if coluna == 'mb.id':
+                return query + f" ORDER BY mb.id {direcao}", params
+            nulos = ' NULLS FIRST' if decrescente else ''
+            return query + f" ORDER BY {coluna} {direcao}{nulos}, mb.id {direcao}", params
+
+        def chave(row):
+            return [row['id']] if coluna == 'mb.id' else [row['ordem'], row['id']]
+
+        pagina = self._paginar(montar_consulta, chave, 1 if coluna == 'mb.id' else 2, tamanho_pagina, token)
+        if pagina is None:
+            return None
+        registros, proximo_token = pagina
+        return [{campo: row[campo] for campo in ('id', 'titulo', 'autor', 'categoria', 'status')}
+                for row in registros], proximo_token
+
     def listar_acervo_com_status(self):
         acervo = self.listar_acervo()
+        status_materiais = self.verificar_status_materiais()
         for material in acervo:
-            material['status'] = self.verificar_status_material(material['id'])
+            material['status'] = status_materiais.get(material['id'], "Disponível")
         return acervo
     
     def verificar_status_material(self, material_id):
-        query_emprestimo = "SELECT COUNT(*) FROM emprestimo WHERE material_id = ? AND data_devolucao_real IS NULL"
-        emprestado = self._fetch_one(query_emprestimo, (material_id,))['COUNT(*)'] > 0
-        
-        if emprestado:
+        # Situação mantida pelos gatilhos de emprestimo e reserva (tabela material_status)
+        query = """
+        SELECT emprestimos_abertos, reservas_pendentes
+        FROM material_status
+        WHERE material_id = ?
+        """
+        status = self._fetch_one(query, (material_id,))
+
+        if status and status['emprestimos_abertos'] > 0:
             return "Emprestado"
-            
-        query_reserva = "SELECT COUNT(*) FROM reserva WHERE material_id = ? AND status_reserva = 'pendente'"
-        reservado = self._fetch_one(query_reserva, (material_id,))['COUNT(*)'] > 0
 
-        if reservado:
+        if status and status['reservas_pendentes'] > 0:
             return "Reservado"
 
         return "Disponível"
 
-
-    def buscar_material_por_id(self, material_id):
-        query = """
-        SELECT 
-            mb.id, mb.autor, mb.titulo, mb.ano, mb.categoria,
-            l.genero AS livro_genero, l.movimento AS livro_movimento, l.editora AS livro_editora,
-            a.turma AS apostila_turma, a.disciplina AS apostila_disciplina,
-            e.genero AS ebook_genero, e.movimento AS ebook_movimento, e.url AS ebook_url,
-            r.editora AS revista_editora
+    def verificar_status_materiais(self, material_ids=None):
+        # Resolve o status de vários materiais de uma vez; sem ids, considera o acervo inteiro
+        query = f"""
+        SELECT mb.id,
+            {SQL_STATUS_MATERIAL} AS status
         FROM material_bibliografico mb
-        LEFT JOIN livro l ON mb.id = l.id
-        LEFT JOIN apostila a ON mb.id = a.id
-        LEFT JOIN ebook e ON mb.id = e.id
-        LEFT JOIN revista r ON mb.id = r.id
-        LEFT JOIN resenha_material rm ON mb.id = rm.id
-        LEFT JOIN trabalho t ON mb.id = t.id
-        WHERE mb.id = ?
+        LEFT JOIN material_status ms ON mb.id = ms.material_id
         """
+        status_materiais = {}
+        if material_ids is None:
+            for row in self._fetch_all(query) or []:
+                status_materiais[row['id']] = row['status']
+            return status_materiais
+
+        material_ids = list(dict.fromkeys(material_ids))
+        # Lotes abaixo do limite de parâmetros do SQLite
+        for inicio in range(0, len(material_ids), self.TAMANHO_LOTE_IDS):
+            lote = material_ids[inicio:inicio + self.TAMANHO_LOTE_IDS]
+            query_lote = query + f" WHERE mb.id IN ({','.join(['?' for _ in lote])})"
+            for row in self._fetch_all(query_lote, tuple(lote)) or []:
+                status_materiais[row['id']] = row['status']
+        return status_materiais
+
+
+    def buscar_material_por_id(self, material_id):
+        query = self.CONSULTA_ACERVO + " WHERE mb.id = ?"
         material_db = self._fetch_one(query, (material_id,))
         if material_db:
-            material_info = dict(material_db)
-            nota_media = self.calcular_nota_media_material(material_id)
-            material_info['nota_media'] = nota_media if nota_media is not None else 0.0
-            return material_info
+            return self._material_com_nota(material_db)
         return None
+
+    def buscar_materiais_por_ids(self, material_ids):
+        # Detalhes, nota média e status de vários materiais em poucas consultas (uma por lote
+        # de TAMANHO_LOTE_IDS). Retorna {id: material}; ids inexistentes ficam de fora.
+        query = _consulta_materiais(com_status=True)
+        materiais = {}
+        material_ids = list(dict.fromkeys(material_ids))
+        for inicio in range(0, len(material_ids), self.TAMANHO_LOTE_IDS):
+            lote = material_ids[inicio:inicio + self.TAMANHO_LOTE_IDS]
+            query_lote = query + f" WHERE mb.id IN ({','.join(['?' for _ in lote])})"
+            for row in self._fetch_all(query_lote, tuple(lote)) or []:
+                materiais[row['id']] = self._material_com_nota(row)
+        return materiais
+
+    def _material_com_nota(self, row):
+        # Mesmo arredondamento de calcular_nota_media_material; 0.0 quando não há avaliações
+        material_info = dict(row)
+        nota_media = material_info['nota_media']
+        material_info['nota_media'] = round(nota_media, 2) if nota_media is not None else 0.0
+        return material_info
     
     def buscar_materiais_titulo(self, titulo_parcial):
-        query = """
+        # Títulos que começam com o texto (índice em titulo_normalizado) vêm primeiro,
+        # seguidos das palavras do título encontradas pelo índice textual
+        return self._buscar_por_campo('titulo', titulo_parcial)
+
+    def buscar_materiais_autor(self, autor_parcial):
+        return self._buscar_por_campo('autor', autor_parcial)
+
+    def _buscar_por_campo(self, campo, texto):
+        prefixo = normalizar_texto(texto)
+        expressao = self._expressao_busca(texto)
+        if not prefixo or not expressao:
+            return []
+
+        query_prefixo = f"""
         SELECT 
             mb.id, mb.autor, mb.titulo, mb.ano, mb.categoria
         FROM material_bibliografico mb
-        WHERE mb.titulo LIKE ?
+        WHERE mb.{campo}_normalizado >= ? AND mb.{campo}_normalizado < ?
+        ORDER BY mb.{campo}_normalizado
+        """
+        query_palavras = """
+        SELECT 
+            mb.id, mb.autor, mb.titulo, mb.ano, mb.categoria
+        FROM material_busca
+        JOIN material_bibliografico mb ON mb.id = material_busca.rowid
+        WHERE material_busca MATCH ?
+        ORDER BY bm25(material_busca)
         """
-        return self._fetch_all(query, (f'%{titulo_parcial}%',))
+        por_prefixo = self._fetch_all(query_prefixo, (prefixo, prefixo + chr(0x10FFFF))) or []
+        por_palavras = self._fetch_all(query_palavras, (f'{campo} : ({expressao})',)) or []
+
+        encontrados = {row['id'] for row in por_prefixo}
+        return por_prefixo + [row for row in por_palavras if row['id'] not in encontrados]
+
+    def buscar_materiais(self, termo, limite=20, deslocamento=0):
+        # Busca em título, autor, gênero, editora e disciplina, ordenada por relevância (bm25)
+        expressao = self._expressao_busca(termo)
+        if not expressao:
+            return []
+        query = """
+        SELECT 
+            mb.id, mb.autor, mb.titulo, mb.ano, mb.categoria,
+            bm25(material_busca, 10.0, 5.0, 2.0, 1.0, 2.0) AS relevancia
+        FROM material_busca
+        JOIN material_bibliografico mb ON mb.id = material_busca.rowid
+        WHERE material_busca MATCH ?
+        ORDER BY relevancia
+        LIMIT ? OFFSET ?
+        """
+        return self._fetch_all(query, (expressao, limite, deslocamento))
+
+    def _expressao_busca(self, termo):
+        # Converte o texto digitado em uma consulta FTS5 de prefixos, escapando aspas e operadores
+        palavras = re.findall(r'\w+', termo or '')
+        return ' '.join(f'"{palavra}"*' for palavra in palavras)
     
     def remover_material(self, material_id):
         try:
             query = "DELETE FROM material_bibliografico WHERE id = ?"
-            if self.execute_query(query, (material_id,)):
+            alteradas = self._alterar(query, (material_id,))
+            if alteradas is not None:
                 print(f"Material com ID {material_id} removido com sucesso.")
+                if alteradas:
+                    self._publicar(MaterialRemovido(material_id))
                 return True
             else:
                 print(f"Erro ao remover o material com ID {material_id}.")
@@ -365,14 +1048,18 @@ class Biblioteca:
             return True
         return False
     
-    def listar_amigos(self, usuario_id):
-        query = """
+    CONSULTA_AMIGOS = """
         SELECT u.id, u.nome, u.email
         FROM usuario u
         JOIN amizade a ON (u.id = a.usuario_id1 OR u.id = a.usuario_id2)
         WHERE (a.usuario_id1 = ? OR a.usuario_id2 = ?) AND u.id != ?
         """
-        return self._fetch_all(query, (usuario_id, usuario_id, usuario_id))
+
+    def listar_amigos(self, usuario_id):
+        return self._fetch_all(self.CONSULTA_AMIGOS, (usuario_id, usuario_id, usuario_id))
+
+    def iterar_amigos(self, usuario_id, tamanho_lote=None):
+        return self._iterar(self.CONSULTA_AMIGOS, (usuario_id, usuario_id, usuario_id), tamanho_lote)
 
     # Métodos para empréstimos
     def registrar_emprestimo(self, usuario_id, material_id, data_devolucao_prevista):
@@ -383,6 +1070,7 @@ class Biblioteca:
         """
         if self.execute_query(query, (usuario_id, material_id, data_emprestimo, data_devolucao_prevista)):
             print(f"Empréstimo do material {material_id} para o usuário {usuario_id} registrado.")
+            self._publicar(EmprestimoAberto(usuario_id, material_id))
             return True
         return False
     
@@ -391,6 +1079,10 @@ class Biblioteca:
         query = 'UPDATE emprestimo SET data_devolucao_real = ? WHERE id = ?'
         if self.execute_query(query, (data_devolucao_real, emprestimo_id)):
             print(f"Devolução do empréstimo {emprestimo_id} registrada.")
+            emprestimo = self._fetch_one('SELECT usuario_id, material_id FROM emprestimo WHERE id = ?',
+                                         (emprestimo_id,))
+            if emprestimo:
+                self._publicar(EmprestimoFechado(emprestimo_id, emprestimo['usuario_id'], emprestimo['material_id']))
             return True
         return False
     
@@ -402,8 +1094,7 @@ class Biblioteca:
         query = "SELECT id, usuario_id FROM emprestimo WHERE material_id = ? AND data_devolucao_real IS NULL"
         return self._fetch_one(query, (material_id,))
 
-    def listar_emprestimos_usuario(self, usuario_id):
-        query = """
+    CONSULTA_EMPRESTIMOS_USUARIO = """
         SELECT e.id, e.material_id, mb.titulo, e.data_emprestimo, 
                e.data_devolucao_prevista, e.data_devolucao_real
         FROM emprestimo e
@@ -411,7 +1102,30 @@ class Biblioteca:
         WHERE e.usuario_id = ?
         ORDER BY e.data_emprestimo DESC 
         """
-        return self._fetch_all(query, (usuario_id,))
+
+    def listar_emprestimos_usuario(self, usuario_id):
+        return self._fetch_all(self.CONSULTA_EMPRESTIMOS_USUARIO, (usuario_id,))
+
+    def iterar_emprestimos_usuario(self, usuario_id, tamanho_lote=None):
+        return self._iterar(self.CONSULTA_EMPRESTIMOS_USUARIO, (usuario_id,), tamanho_lote)
+
+    def paginar_emprestimos_usuario(self, usuario_id, tamanho_pagina=50, token=None):
+        # Mais recentes primeiro; o id desempata empréstimos com a mesma data
+        def montar_consulta(posicao):
+            query = """
+            SELECT e.id, e.material_id, mb.titulo, e.data_emprestimo,
+                   e.data_devolucao_prevista, e.data_devolucao_real
+            FROM emprestimo e
+            JOIN material_bibliografico mb ON e.material_id = mb.id
+            WHERE e.usuario_id = ?
+            """
+            params = (usuario_id,)
+            if posicao:
+                query += " AND (e.data_emprestimo, e.id) < (?, ?)"
+                params += tuple(posicao)
+            return query + " ORDER BY e.data_emprestimo DESC, e.id DESC", params
+        return self._paginar(montar_consulta, lambda row: [row['data_emprestimo'], row['id']], 2,
+                             tamanho_pagina, token)
     
 
 
@@ -427,8 +1141,7 @@ class Biblioteca:
             return True
         return False
     
-    def listar_acessos_ebook_usuario(self, usuario_id):
-        query = """
+    CONSULTA_ACESSOS_EBOOK_USUARIO = """
         SELECT ae.ebook_id, mb.titulo, ae.data_acesso, ae.duracao_acesso
         FROM acesso_ebook ae
         JOIN ebook e ON ae.ebook_id = e.id
@@ -436,7 +1149,12 @@ class Biblioteca:
         WHERE ae.usuario_id = ?
         ORDER BY ae.data_acesso DESC
         """
-        return self._fetch_all(query, (usuario_id,))
+
+    def listar_acessos_ebook_usuario(self, usuario_id):
+        return self._fetch_all(self.CONSULTA_ACESSOS_EBOOK_USUARIO, (usuario_id,))
+
+    def iterar_acessos_ebook_usuario(self, usuario_id, tamanho_lote=None):
+        return self._iterar(self.CONSULTA_ACESSOS_EBOOK_USUARIO, (usuario_id,), tamanho_lote)
     
 
 
@@ -463,15 +1181,19 @@ class Biblioteca:
             return True
         return False
     
-    def listar_favoritos_usuario(self, usuario_id):
-        query = """
+    CONSULTA_FAVORITOS_USUARIO = """
         SELECT f.material_id, mb.titulo, mb.autor, f.data_favorito
         FROM favorita f
         JOIN material_bibliografico mb ON f.material_id = mb.id
         WHERE f.usuario_id = ?
         ORDER BY f.data_favorito DESC
         """
-        return self._fetch_all(query, (usuario_id,))
+
+    def listar_favoritos_usuario(self, usuario_id):
+        return self._fetch_all(self.CONSULTA_FAVORITOS_USUARIO, (usuario_id,))
+
+    def iterar_favoritos_usuario(self, usuario_id, tamanho_lote=None):
+        return self._iterar(self.CONSULTA_FAVORITOS_USUARIO, (usuario_id,), tamanho_lote)
     
 
 
@@ -485,6 +1207,7 @@ class Biblioteca:
         try:
             if self.execute_query(query, (usuario_id, material_id, texto_resenha, data_resenha)):
                 print(f"Resenha para o material {material_id} pelo usuário {usuario_id} adicionada.")
+                self._publicar(ResenhaAlterada(usuario_id, material_id))
                 return True
             return False
         except sqlite3.IntegrityError:
@@ -497,37 +1220,68 @@ class Biblioteca:
         WHERE usuario_id = ? AND material_id = ?
         """
         data_resenha = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        if self.execute_query(query, (novo_texto, data_resenha, usuario_id, material_id)):
+        alteradas = self._alterar(query, (novo_texto, data_resenha, usuario_id, material_id))
+        if alteradas is not None:
             print(f"Resenha para o material {material_id} pelo usuário {usuario_id} atualizada.")
+            if alteradas:
+                self._publicar(ResenhaAlterada(usuario_id, material_id))
             return True
         return False
     
     def remover_resenha(self, usuario_id, material_id):
         query = 'DELETE FROM resenha WHERE usuario_id = ? AND material_id = ?'
-        if self.execute_query(query, (usuario_id, material_id)):
+        alteradas = self._alterar(query, (usuario_id, material_id))
+        if alteradas is not None:
             print(f"Resenha para o material {material_id} pelo usuário {usuario_id} removida.")
+            if alteradas:
+                self._publicar(ResenhaAlterada(usuario_id, material_id))
             return True
         return False
     
-    def listar_resenhas_material(self, material_id):
-        query = """
+    CONSULTA_RESENHAS_MATERIAL = """
         SELECT r.usuario_id, u.nome, r.texto_resenha, r.data_resenha
         FROM resenha r
         JOIN usuario u ON r.usuario_id = u.id
         WHERE r.material_id = ?
         ORDER BY r.data_resenha DESC
         """
-        return self._fetch_all(query, (material_id,))
+
+    def listar_resenhas_material(self, material_id):
+        return self._fetch_all(self.CONSULTA_RESENHAS_MATERIAL, (material_id,))
+
+    def iterar_resenhas_material(self, material_id, tamanho_lote=None):
+        return self._iterar(self.CONSULTA_RESENHAS_MATERIAL, (material_id,), tamanho_lote)
+
+    def paginar_resenhas_material(self, material_id, tamanho_pagina=50, token=None):
+        # Mais recentes primeiro; o id da resenha desempata resenhas com a mesma data
+        def montar_consulta(posicao):
+            query = """
+            SELECT r.id, r.usuario_id, u.nome, r.texto_resenha, r.data_resenha
+            FROM resenha r
+            JOIN usuario u ON r.usuario_id = u.id
+            WHERE r.material_id = ?
+            """
+            params = (material_id,)
+            if posicao:
+                query += " AND (r.data_resenha, r.id) < (?, ?)"
+                params += tuple(posicao)
+            return query + " ORDER BY r.data_resenha DESC, r.id DESC", params
+        return self._paginar(montar_consulta, lambda row: [row['data_resenha'], row['id']], 2,
+                             tamanho_pagina, token)
     
-    def listar_resenhas_usuario(self, usuario_id):
-        query = """
+    CONSULTA_RESENHAS_USUARIO = """
         SELECT r.material_id, mb.titulo, r.texto_resenha, r.data_resenha
         FROM resenha r
         JOIN material_bibliografico mb ON r.material_id = mb.id
         WHERE r.usuario_id = ?
         ORDER BY r.data_resenha DESC
         """
-        return self._fetch_all(query, (usuario_id,))
+
+    def listar_resenhas_usuario(self, usuario_id):
+        return self._fetch_all(self.CONSULTA_RESENHAS_USUARIO, (usuario_id,))
+
+    def iterar_resenhas_usuario(self, usuario_id, tamanho_lote=None):
+        return self._iterar(self.CONSULTA_RESENHAS_USUARIO, (usuario_id,), tamanho_lote)
     
 
 
@@ -545,6 +1299,7 @@ class Biblioteca:
         try:
             if self.execute_query(query, (usuario_id, material_id, nota, data_avaliacao)):
                 print(f"Material {material_id} avaliado com nota {nota} pelo usuário {usuario_id}.")
+                self._publicar(AvaliacaoAlterada(usuario_id, material_id))
                 return True
             return False
         except sqlite3.IntegrityError:
@@ -561,20 +1316,26 @@ class Biblioteca:
         WHERE usuario_id = ? AND material_id = ?
         """
         data_avaliacao = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        if self.execute_query(query, (nova_nota, data_avaliacao, usuario_id, material_id)):
+        alteradas = self._alterar(query, (nova_nota, data_avaliacao, usuario_id, material_id))
+        if alteradas is not None:
             print(f"Avaliação do material {material_id} pelo usuário {usuario_id} atualizada para {nova_nota}.")
+            if alteradas:
+                self._publicar(AvaliacaoAlterada(usuario_id, material_id))
             return True
         return False
 
     def remover_avaliacao(self, usuario_id, material_id):
         query = 'DELETE FROM avaliacao WHERE usuario_id = ? AND material_id = ?'
-        if self.execute_query(query, (usuario_id, material_id)):
+        alteradas = self._alterar(query, (usuario_id, material_id))
+        if alteradas is not None:
             print(f"Avaliação do material {material_id} pelo usuário {usuario_id} removida.")
+            if alteradas:
+                self._publicar(AvaliacaoAlterada(usuario_id, material_id))
             return True
         return False
 
     def calcular_nota_media_material(self, material_id):
-        query = 'SELECT AVG(nota) as nota_media FROM avaliacao WHERE material_id = ?'
+        query = 'SELECT soma_notas / total_avaliacoes AS nota_media FROM avaliacao_resumo WHERE material_id = ?'
         resultado = self._fetch_one(query, (material_id,))
         if resultado and resultado['nota_media'] is not None:
             return round(resultado['nota_media'], 2)
@@ -592,6 +1353,7 @@ class Biblioteca:
         try:
             if self.execute_query(query, (usuario_id, material_id, status, data_reserva)):
                 print(f"Reserva do material {material_id} pelo usuário {usuario_id} registrada.")
+                self._publicar(ReservaAlterada(usuario_id, material_id))
                 return True
             return False
         except sqlite3.IntegrityError:
@@ -599,21 +1361,29 @@ class Biblioteca:
             return False
     
     def cancelar_reserva(self, reserva_id):
+        # Lida antes do DELETE, para o evento saber de qual material era a reserva
+        reserva = self._fetch_one('SELECT usuario_id, material_id FROM reserva WHERE id = ?', (reserva_id,))
         query = 'DELETE FROM reserva WHERE id = ?'
         if self.execute_query(query, (reserva_id,)):
             print(f"Reserva com ID {reserva_id} cancelada.")
+            if reserva:
+                self._publicar(ReservaAlterada(reserva['usuario_id'], reserva['material_id']))
             return True
         return False
 
-    def listar_reservas_usuario(self, usuario_id):
-        query = """
+    CONSULTA_RESERVAS_USUARIO = """
         SELECT r.id, r.material_id, mb.titulo, r.data_reserva, r.status_reserva
         FROM reserva r
         JOIN material_bibliografico mb ON r.material_id = mb.id
         WHERE r.usuario_id = ?
         ORDER BY r.data_reserva DESC
         """
-        return self._fetch_all(query, (usuario_id,))
+
+    def listar_reservas_usuario(self, usuario_id):
+        return self._fetch_all(self.CONSULTA_RESERVAS_USUARIO, (usuario_id,))
+
+    def iterar_reservas_usuario(self, usuario_id, tamanho_lote=None):
+        return self._iterar(self.CONSULTA_RESERVAS_USUARIO, (usuario_id,), tamanho_lote)
     
     def recomendar_por_genero(self, usuario_id, limit=5):
         #recomenda materiais baseados nos gêneros/categorias que o usuário mais interagiu.
@@ -669,14 +1439,10 @@ class Biblioteca:
             return False
 
         query = 'UPDATE usuario SET nome = ? WHERE id = ?'
-        try:
-            with self.conn:
-                self.cursor.execute(query, (novo_nome, user_id))
-                print(f"Nome do usuário com ID {user_id} atualizado para '{novo_nome}'.")
-                return True
-        except sqlite3.Error as e:
-            print(f"Erro ao executar a query: {e}")
-            return False
+        if self.execute_query(query, (novo_nome, user_id)):
+            print(f"Nome do usuário com ID {user_id} atualizado para '{novo_nome}'.")
+            return True
+        return False
     
     
 
@@ -0,0 +1,139 @@
+import threading
+import traceback
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class _SinaisTarefa(QObject):
+    # QRunnable não é QObject: o sinal de término fica num objeto à parte
+    terminou = pyqtSignal(object, object, object)  # tarefa, resultado, erro
+
+
+class Tarefa(QRunnable):
+    # Chamada à Biblioteca feita numa thread do pool. Durante a tarefa a thread tem a sua
+    # própria conexão de leitura (biblioteca.conexao()); escritas passam pela conexão de
+    # escrita, que a Biblioteca serializa entre as threads.
+    def __init__(self, biblioteca, funcao, args, ao_concluir, ao_falhar, chave):
+        super().__init__()
+        # O executor guarda a referência até o término ser entregue na thread da interface
+        self.setAutoDelete(False)
+        self.biblioteca = biblioteca
+        self.funcao = funcao
+        self.args = args
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.chave = chave
+        self.cancelada = False
+        self.sinais = _SinaisTarefa()
+        self._trava = threading.Lock()
+        self._conn = None
+
+    def run(self):
+        resultado = erro = None
+        if not self.cancelada:
+            try:
+                with self.biblioteca.conexao():
+                    with self._trava:
+                        self._conn = self.biblioteca.conn
+                    try:
+                        resultado = self.funcao(*self.args)
+                    finally:
+                        # Depois disso a conexão volta ao pool e não pode mais ser interrompida
+                        with self._trava:
+                            self._conn = None
+            except Exception as e:
+                erro = e
+        self.sinais.terminou.emit(self, resultado, erro)
+
+    def cancelar(self):
+        # O resultado será descartado; uma consulta em andamento na conexão de leitura da
+        # tarefa é interrompida (a chamada à Biblioteca falha e devolve None)
+        self.cancelada = True
+        with self._trava:
+            if self._conn is not None:
+                self._conn.interrupt()
+
+
+class ExecutorBanco(QObject):
+    # Executa chamadas à Biblioteca fora da thread da interface e entrega o resultado (ou a
+    # exceção) nela, por sinal. Uma tarefa nova com a mesma chave cancela a anterior, para
+    # que uma tela recarregada não receba dados antigos. Só leituras levam chave: escritas
+    # (sem chave) nunca são canceladas pelo executor, nem ao encerrar.
+    ocupado = pyqtSignal(bool)
+
+    def __init__(self, biblioteca, parent=None):
+        super().__init__(parent)
+        self.biblioteca = biblioteca
+        self.pool = QThreadPool(self)
+        # Sobra uma conexão de leitura do pool para as consultas feitas direto na thread da interface
+        self.pool.setMaxThreadCount(max(1, biblioteca.tamanho_pool - 1))
+        self._tarefas = set()
+        self._por_chave = {}
+
+    def executar(self, funcao, *args, ao_concluir=None, ao_falhar=None, chave=None):
+        if chave is not None and chave in self._por_chave:
+            self.cancelar(self._por_chave[chave])
+        tarefa = Tarefa(self.biblioteca, funcao, args, ao_concluir, ao_falhar, chave)
+        tarefa.sinais.terminou.connect(self._terminou)
+        self._tarefas.add(tarefa)
+        if chave is not None:
+            self._por_chave[chave] = tarefa
+        if len(self._tarefas) == 1:
+            self.ocupado.emit(True)
+        self.pool.start(tarefa)
+        return tarefa
+
+    def cancelar(self, tarefa):
+        tarefa.cancelar()
+        # Ainda na fila: sai dela sem chegar a rodar
+        if self.pool.tryTake(tarefa):
+            self._terminou(tarefa, None, None)
+
+    def em_andamento(self):
+        return len(self._tarefas)
+
+    def encerrar(self, timeout_ms=-1):
+        # Ao fechar a janela: cancela as leituras (com chave) e espera as demais tarefas, para
+        # que uma escrita já confirmada pelo usuário e ainda na fila seja gravada. A janela
+        # está fechando, então os retornos não são entregues; só um erro é impresso.
+        for tarefa in list(self._por_chave.values()):
+            self.cancelar(tarefa)
+        for tarefa in self._tarefas:
+            tarefa.ao_concluir = tarefa.ao_falhar = None
+        return self.pool.waitForDone(timeout_ms)
+
+    @pyqtSlot(object, object, object)
+    def _terminou(self, tarefa, resultado, erro):
+        if tarefa not in self._tarefas:
+            return
+        self._tarefas.discard(tarefa)
+        if self._por_chave.get(tarefa.chave) is tarefa:
+            del self._por_chave[tarefa.chave]
+        if not self._tarefas:
+            self.ocupado.emit(False)
+        if tarefa.cancelada:
+            return
+        if erro is not None:
+            if tarefa.ao_falhar:
+                tarefa.ao_falhar(erro)
+            else:
+                print("Erro em tarefa de segundo plano:")
+                traceback.print_exception(type(erro), erro, erro.__traceback__)
+        elif tarefa.ao_concluir:
+            tarefa.ao_concluir(resultado)
+
+
+class PonteEventos(QObject):
+    # Repassa os eventos da Biblioteca, publicados na thread que gravou (em geral uma tarefa
+    # do executor), para a thread da interface: quem conecta em evento recebe lá
+    evento = pyqtSignal(object)
+
+    def __init__(self, biblioteca, parent=None):
+        super().__init__(parent)
+        self.biblioteca = biblioteca
+        biblioteca.eventos.assinar(self._repassar)
+
+    def _repassar(self, evento):
+        self.evento.emit(evento)
+
+    def desligar(self):
+        self.biblioteca.eventos.cancelar_assinatura(self._repassar)
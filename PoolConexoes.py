@@ -0,0 +1,268 @@
+import time
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+
+# Perfis de configuração aplicados a cada conexão nova (valores em PRAGMA). Todos usam WAL,
+# em que leitores não bloqueiam o escritor nem são bloqueados por ele.
+#   desk: uso interativo pela interface; synchronous NORMAL é seguro contra corrupção em WAL
+#         e só pode perder os últimos commits numa queda de energia
+#   batch-import: cache grande e synchronous OFF; uma importação interrompida pode ser refeita
+#   read-only-report: só leitura (query_only), cache e mmap grandes para varreduras longas
+# cache_size negativo é em KiB; mmap_size em bytes; busy_timeout em milissegundos.
+PERFIS = {
+    'desk': {
+        'journal_mode': 'wal', 'synchronous': 'normal', 'cache_size': -16384,
+        'mmap_size': 64 * 1024 * 1024, 'temp_store': 'memory', 'busy_timeout': 5000,
+    },
+    'batch-import': {
+        'journal_mode': 'wal', 'synchronous': 'off', 'cache_size': -262144,
+        'mmap_size': 256 * 1024 * 1024, 'temp_store': 'memory', 'busy_timeout': 30000,
+    },
+    'read-only-report': {
+        'journal_mode': 'wal', 'synchronous': 'normal', 'cache_size': -65536,
+        'mmap_size': 1024 * 1024 * 1024, 'temp_store': 'memory', 'busy_timeout': 10000,
+        'query_only': 1,
+    },
+}
+
+# Como o SQLite devolve os PRAGMAs que aceitam nomes
+_VALORES_NUMERICOS = {
+    'synchronous': {'off': 0, 'normal': 1, 'full': 2, 'extra': 3},
+    'temp_store': {'default': 0, 'file': 1, 'memory': 2},
+}
+
+
+def aplicar_perfil(conn, perfil, somente_leitura=False):
+    if perfil not in PERFIS:
+        raise ValueError(f"Perfil de conexão desconhecido: {perfil}")
+    # Na ordem do dicionário: query_only fica por último, depois de journal_mode
+    for pragma, valor in PERFIS[perfil].items():
+        # O modo WAL fica gravado no arquivo; quem o define é a conexão de escrita
+        if somente_leitura and pragma == 'journal_mode':
+            continue
+        conn.execute(f"PRAGMA {pragma} = {valor}")
+
+
+def verificar_perfil(conn, perfil):
+    # Retorna {pragma: (esperado, atual)} para cada valor que não foi aplicado; vazio se tudo confere
+    divergencias = {}
+    for pragma, valor in PERFIS[perfil].items():
+        row = conn.execute(f"PRAGMA {pragma}").fetchone()
+        atual = row[0] if row else None
+        esperado = _VALORES_NUMERICOS.get(pragma, {}).get(valor, valor)
+        if isinstance(atual, str):
+            atual = atual.lower()
+        if atual != esperado:
+            divergencias[pragma] = (esperado, atual)
+    return divergencias
+
+
+class CursorMedido(sqlite3.Cursor):
+    # Soma nas métricas da conexão o número de comandos, o tempo de execução e os erros
+    def _medir(self, executar, query, params):
+        metricas = self.connection.metricas
+        inicio = time.perf_counter()
+        try:
+            return executar(query, params)
+        except sqlite3.Error:
+            metricas['erros'] += 1
+            raise
+        finally:
+            metricas['consultas'] += 1
+            metricas['segundos'] += time.perf_counter() - inicio
+
+    def execute(self, query, params=()):
+        return self._medir(super().execute, query, params)
+
+    def executemany(self, query, params):
+        return self._medir(super().executemany, query, params)
+
+
+class ConexaoMedida(sqlite3.Connection):
+    # Conexão com nome e métricas próprias; todo comando passa por um CursorMedido
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nome = None
+        self.metricas = {'consultas': 0, 'erros': 0, 'segundos': 0.0}
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, query, params=()):
+        return self.cursor().execute(query, params)
+
+    def executemany(self, query, params):
+        return self.cursor().executemany(query, params)
+
+
+def banco_em_arquivo(db_name):
+    # ':memory:', '' (banco temporário) e URIs file: não são um caminho que outra conexão
+    # possa reabrir em modo somente leitura
+    return db_name not in ('', ':memory:') and not str(db_name).startswith('file:')
+
+
+def abrir_conexao(db_name, perfil='desk', somente_leitura=False, nome=None):
+    # check_same_thread=False porque a conexão pode ser usada por outra thread depois
+    # (ao voltar ao pool, ou a de escrita, protegida por uma trava); nunca por duas ao mesmo tempo.
+    # Somente leitura abre o arquivo com mode=ro: qualquer escrita falha no próprio SQLite.
+    if somente_leitura:
+        if not banco_em_arquivo(db_name):
+            raise ValueError(f"Conexão somente leitura exige um arquivo de banco: {db_name!r}")
+        conn = sqlite3.connect(Path(db_name).resolve().as_uri() + '?mode=ro', uri=True,
+                               isolation_level=None, check_same_thread=False, factory=ConexaoMedida)
+    else:
+        conn = sqlite3.connect(db_name, uri=str(db_name).startswith('file:'), isolation_level=None,
+                               check_same_thread=False, factory=ConexaoMedida)
+    conn.nome = nome
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    aplicar_perfil(conn, perfil, somente_leitura)
+    return conn
+
+
+class PoolConexoes:
+    def __init__(self, db_name='Biblioteca.db', tamanho=4, timeout=10.0, perfil='desk',
+                 somente_leitura=False):
+        if perfil not in PERFIS:
+            raise ValueError(f"Perfil de conexão desconhecido: {perfil}")
+        self.db_name = db_name
+        self.perfil = perfil
+        self.somente_leitura = somente_leitura
+        self.tamanho = tamanho
+        self.timeout = timeout
+        # LIFO: a conexão devolvida por último é a próxima a sair (cache do SQLite ainda quente)
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._trava = threading.Lock()
+        self._fechado = False
+        self._abertas = 0
+        # Conexões ainda abertas, para as métricas por conexão
+        self._conexoes = []
+        self._metricas = {'obtidas': 0, 'esperas': 0, 'segundos_espera': 0.0, 'descartadas': 0}
+
+    def _criar_conexao(self):
+        with self._trava:
+            self._abertas += 1
+            nome = f"{'leitor' if self.somente_leitura else 'conexao'}-{self._abertas}"
+        conn = abrir_conexao(self.db_name, self.perfil, self.somente_leitura, nome)
+        with self._trava:
+            self._conexoes.append(conn)
+        return conn
+
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._trava:
+            if conn in self._conexoes:
+                self._conexoes.remove(conn)
+
+    def verificar_perfil(self, conn):
+        return verificar_perfil(conn, self.perfil)
+
+    def _saudavel(self, conn):
+        # Direto no sqlite3, para a verificação não contar nas métricas da conexão
+        try:
+            sqlite3.Connection.execute(conn, "SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _reservar_vaga(self):
+        with self._trava:
+            if self._criadas < self.tamanho:
+                self._criadas += 1
+                return True
+            return False
+
+    def _liberar_vaga(self):
+        with self._trava:
+            self._criadas -= 1
+
+    def _contar(self, chave, valor=1):
+        with self._trava:
+            self._metricas[chave] += valor
+
+    def obter(self, timeout=None):
+        # Retira uma conexão do pool, abrindo uma nova enquanto houver vaga. Com o pool
+        # cheio, espera até timeout segundos por uma devolução.
+        if self._fechado:
+            raise sqlite3.ProgrammingError("Pool de conexões fechado.")
+        self._contar('obtidas')
+        try:
+            conn = self._livres.get_nowait()
+        except queue.Empty:
+            if self._reservar_vaga():
+                try:
+                    return self._criar_conexao()
+                except sqlite3.Error:
+                    self._liberar_vaga()
+                    raise
+            inicio = time.perf_counter()
+            try:
+                conn = self._livres.get(timeout=self.timeout if timeout is None else timeout)
+            except queue.Empty:
+                raise sqlite3.OperationalError(
+                    f"Nenhuma conexão livre no pool ({self.tamanho} em uso).") from None
+            finally:
+                self._contar('esperas')
+                self._contar('segundos_espera', time.perf_counter() - inicio)
+
+        if not self._saudavel(conn):
+            # Descarta a conexão com problema e abre outra no lugar dela
+            self._contar('descartadas')
+            self._descartar(conn)
+            try:
+                conn = self._criar_conexao()
+            except sqlite3.Error:
+                self._liberar_vaga()
+                raise
+        return conn
+
+    def devolver(self, conn):
+        # Uma transação esquecida aberta é desfeita antes de a conexão voltar ao pool;
+        # uma conexão que nem isso aceita (ex.: já fechada) é descartada e libera a vaga
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._contar('descartadas')
+            self._descartar(conn)
+            self._liberar_vaga()
+            return
+        if self._fechado:
+            self._descartar(conn)
+            self._liberar_vaga()
+            return
+        self._livres.put(conn)
+
+    @contextmanager
+    def conexao(self, timeout=None):
+        conn = self.obter(timeout)
+        try:
+            yield conn
+        finally:
+            self.devolver(conn)
+
+    def fechar(self):
+        # Fecha as conexões livres; as que estão em uso são fechadas ao serem devolvidas
+        self._fechado = True
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+            self._liberar_vaga()
+
+    def metricas(self):
+        # Contadores do pool e, por nome, os de cada conexão aberta
+        with self._trava:
+            conexoes = list(self._conexoes)
+        return dict(self._metricas, em_uso=self._criadas - self._livres.qsize(),
+                    conexoes={conn.nome: dict(conn.metricas) for conn in conexoes})
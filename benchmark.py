@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+import contextlib
+import io
+from Biblioteca import Biblioteca
+from dados import criar_tabelas
+from MaterialBibliografico import Livro, Ebook, Revista, Apostila, Trabalho
+
+
+def popular_acervo(db_name, quantidade, avaliacoes_por_material=3):
+    # Insere materiais sintéticos direto no banco, sem passar pela Biblioteca
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.executemany(
+        "INSERT INTO usuario (nome, email, senha_hash) VALUES (?, ?, ?)",
+        [(f"Usuário {i}", f"usuario{i}@email.com", "hash") for i in range(avaliacoes_por_material)]
+    )
+    usuarios = [row[0] for row in cursor.execute("SELECT id FROM usuario")]
+
+    categorias = ['livro', 'apostila', 'ebook', 'revista']
+    for i in range(quantidade):
+        categoria = categorias[i % len(categorias)]
+        cursor.execute(
+            "INSERT INTO material_bibliografico (usuario_id, autor, titulo, ano, categoria) VALUES (?, ?, ?, ?, ?)",
+            (usuarios[0], f"Autor {i}", f"Título {i}", 1900 + i % 120, categoria)
+        )
+        material_id = cursor.lastrowid
+        if categoria == 'livro':
+            cursor.execute("INSERT INTO livro (id, genero, movimento, editora) VALUES (?, ?, ?, ?)",
+                           (material_id, "Romance", "Realismo", "Editora"))
+        elif categoria == 'apostila':
+            cursor.execute("INSERT INTO apostila (id, turma, disciplina) VALUES (?, ?, ?)",
+                           (material_id, "Turma", "Disciplina"))
+        elif categoria == 'ebook':
+            cursor.execute("INSERT INTO ebook (id, genero, movimento, url) VALUES (?, ?, ?, ?)",
+                           (material_id, "Ficção", "Contemporâneo", "https://exemplo.com"))
+        else:
+            cursor.execute("INSERT INTO revista (id, editora) VALUES (?, ?)", (material_id, "Editora"))
+        cursor.executemany(
+            "INSERT INTO avaliacao (usuario_id, material_id, nota) VALUES (?, ?, ?)",
+            [(usuario_id, material_id, random.choice([1, 2.5, 3, 4.5, 5])) for usuario_id in usuarios]
+        )
+    conn.commit()
+    conn.close()
+
+
+def contar_consultas(biblioteca, funcao, *args):
+    # Conta quantas instruções SQL a chamada envia ao SQLite
+    consultas = []
+    biblioteca.rastrear_consultas(consultas.append)
+    try:
+        inicio = time.perf_counter()
+        funcao(*args)
+        duracao = time.perf_counter() - inicio
+    finally:
+        biblioteca.rastrear_consultas(None)
+    return len(consultas), duracao
+
+
+def benchmark_listar_acervo(tamanhos=(100, 1000, 10000)):
+    metodos = ['listar_acervo', 'listar_acervo_com_status']
+    print("\n=== BENCHMARK: listagem do acervo ===")
+    print(f"{'Método':<26} {'Materiais':>10} {'Consultas':>10} {'Tempo (s)':>10}")
+    for tamanho in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            db_name = os.path.join(pasta, 'benchmark.db')
+            criar_tabelas(db_name)
+            popular_acervo(db_name, tamanho)
+            biblioteca = Biblioteca(db_name)
+            for metodo in metodos:
+                consultas, duracao = contar_consultas(biblioteca, getattr(biblioteca, metodo))
+                print(f"{metodo:<26} {tamanho:>10} {consultas:>10} {duracao:>10.3f}")
+            biblioteca.close()
+
+
+def gerar_materiais(quantidade):
+    tipos = [
+        lambda i: Livro(None, f"Autor {i}", f"Livro {i}", 2000, "Romance", "Realismo", "Editora"),
+        lambda i: Ebook(None, f"Autor {i}", f"Ebook {i}", 2010, "Ficção", "Contemporâneo", "https://exemplo.com"),
+        lambda i: Revista(None, f"Autor {i}", f"Revista {i}", 2020, "Editora"),
+        lambda i: Apostila(None, f"Autor {i}", f"Apostila {i}", 2021, "Turma", "Disciplina"),
+        lambda i: Trabalho(None, f"Autor {i}", f"Trabalho {i}", 2022),
+    ]
+    for i in range(quantidade):
+        yield tipos[i % len(tipos)](i)
+
+
+def benchmark_lote(tamanhos=(10000, 100000)):
+    print("\n=== BENCHMARK: adicionar_materiais_lote ===")
+    print(f"{'Materiais':>10} {'Tempo (s)':>10} {'Materiais/s':>12}")
+    for tamanho in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            db_name = os.path.join(pasta, 'benchmark.db')
+            criar_tabelas(db_name)
+            with contextlib.redirect_stdout(io.StringIO()):
+                biblioteca = Biblioteca(db_name)
+                inicio = time.perf_counter()
+                ids = biblioteca.adicionar_materiais_lote(gerar_materiais(tamanho))
+                duracao = time.perf_counter() - inicio
+            biblioteca.close()
+        if ids is None or len(ids) != tamanho:
+            print(f"{tamanho:>10} {'falhou':>10}")
+            continue
+        print(f"{tamanho:>10} {duracao:>10.2f} {tamanho / duracao:>12.0f}")
+
+
+def benchmark_paginacao(tamanhos=(10000, 100000), tamanho_pagina=50):
+    # Compara a última página do acervo por OFFSET e por chave (paginar_acervo)
+    print("\n=== BENCHMARK: última página do acervo ===")
+    print(f"{'Materiais':>10} {'OFFSET (s)':>11} {'Chave (s)':>10}")
+    for tamanho in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            db_name = os.path.join(pasta, 'benchmark.db')
+            criar_tabelas(db_name)
+            with contextlib.redirect_stdout(io.StringIO()):
+                biblioteca = Biblioteca(db_name)
+                biblioteca.adicionar_materiais_lote(gerar_materiais(tamanho))
+                _, token = biblioteca.paginar_acervo(tamanho_pagina=tamanho - tamanho_pagina)
+
+            inicio = time.perf_counter()
+            biblioteca._fetch_all(biblioteca.CONSULTA_ACERVO + " ORDER BY mb.id LIMIT ? OFFSET ?",
+                                  (tamanho_pagina, tamanho - tamanho_pagina))
+            duracao_offset = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            biblioteca.paginar_acervo(tamanho_pagina=tamanho_pagina, token=token)
+            duracao_chave = time.perf_counter() - inicio
+            biblioteca.close()
+        print(f"{tamanho:>10} {duracao_offset:>11.4f} {duracao_chave:>10.4f}")
+
+
+if __name__ == "__main__":
+    # Uso: python benchmark.py [acervo|lote|paginacao] [tamanhos...]
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'acervo'
+    tamanhos = tuple(int(arg) for arg in sys.argv[2:])
+    if comando == 'lote':
+        benchmark_lote(tamanhos or (10000, 100000))
+    elif comando == 'paginacao':
+        benchmark_paginacao(tamanhos or (10000, 100000))
+    else:
+        benchmark_listar_acervo(tamanhos or (100, 1000, 10000))
@@ -1,11 +1,83 @@
+import sys
 import sqlite3
+import unicodedata
+
+# Linhas do índice de busca montadas a partir das tabelas do acervo
+_SQL_LINHAS_BUSCA = """
+            INSERT INTO material_busca (rowid, titulo, autor, genero, editora, disciplina)
+            SELECT mb.id, mb.titulo, mb.autor,
+                   COALESCE(l.genero, e.genero), COALESCE(l.editora, r.editora), a.disciplina
+            FROM material_bibliografico mb
+            LEFT JOIN livro l ON mb.id = l.id
+            LEFT JOIN ebook e ON mb.id = e.id
+            LEFT JOIN revista r ON mb.id = r.id
+            LEFT JOIN apostila a ON mb.id = a.id"""
+
+# Regrava a linha do material no índice de busca
+_SQL_INDEXAR_BUSCA = """
+            DELETE FROM material_busca WHERE rowid = {material_id};""" + _SQL_LINHAS_BUSCA + """
+            WHERE mb.id = {material_id};"""
+
+# (nome, tabela, colunas). As colunas de ordenação entram no fim do índice para que
+# listagens como "empréstimos do usuário mais recentes primeiro" não precisem de ordenação extra.
+INDICES = [
+    ('idx_material_categoria', 'material_bibliografico', 'categoria'),
+    ('idx_material_usuario', 'material_bibliografico', 'usuario_id'),
+    ('idx_amizade_usuario2', 'amizade', 'usuario_id2'),
+    ('idx_emprestimo_material', 'emprestimo', 'material_id, data_devolucao_real'),
+    ('idx_emprestimo_usuario', 'emprestimo', 'usuario_id, data_emprestimo'),
+    ('idx_acesso_ebook_usuario', 'acesso_ebook', 'usuario_id, data_acesso'),
+    ('idx_acesso_ebook_ebook', 'acesso_ebook', 'ebook_id'),
+    ('idx_favorita_usuario', 'favorita', 'usuario_id, data_favorito'),
+    ('idx_favorita_material', 'favorita', 'material_id'),
+    ('idx_avaliacao_material', 'avaliacao', 'material_id, nota'),
+    ('idx_resenha_material', 'resenha', 'material_id, data_resenha'),
+    ('idx_resenha_usuario', 'resenha', 'usuario_id, data_resenha'),
+    ('idx_reserva_material', 'reserva', 'material_id, status_reserva'),
+    ('idx_reserva_usuario', 'reserva', 'usuario_id, data_reserva'),
+    ('idx_usuario_nome', 'usuario', 'nome'),
+]
 
 def criar_tabelas(db_name='Biblioteca.db'):
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
+    # Mantido para os chamadores existentes (gui.py, Main.py): aplica as migrações pendentes
+    return migrar(db_name)
 
-    cursor.execute("PRAGMA foreign_keys = ON")
 
+def migrar(db_name='Biblioteca.db'):
+    # Aplica, em uma única transação, as migrações que faltam segundo o PRAGMA user_version.
+    # Um banco já atualizado só tem a versão lida, sem nenhum DDL.
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    try:
+        versao = _versao_banco(conn)
+        if versao >= VERSAO_ATUAL:
+            return versao
+
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Outro processo pode ter migrado enquanto esperávamos o bloqueio
+            versao = _versao_banco(conn)
+            cursor = conn.cursor()
+            for migracao in MIGRACOES[versao:]:
+                migracao(cursor)
+            conn.execute(f"PRAGMA user_version = {max(versao, VERSAO_ATUAL)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return max(versao, VERSAO_ATUAL)
+    finally:
+        conn.close()
+
+
+def _versao_banco(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# As migrações usam IF NOT EXISTS e reconstroem as tabelas derivadas a partir dos dados,
+# então também se aplicam a bancos criados antes do controle de versão (user_version = 0).
+
+def _migracao_tabelas_base(cursor):
     # Tabela de Usuários
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS usuario (
@@ -191,6 +263,509 @@ def criar_tabelas(db_name='Biblioteca.db'):
         );
     """)
 
-    
+
+def _migracao_resumo_avaliacoes(cursor):
+    # Resumo das avaliações por material (soma e quantidade), mantido pelos gatilhos abaixo
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS avaliacao_resumo (
+            material_id INTEGER PRIMARY KEY,
+            soma_notas REAL NOT NULL DEFAULT 0,
+            total_avaliacoes INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (material_id) REFERENCES material_bibliografico (id) ON DELETE CASCADE
+        );
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS avaliacao_resumo_inserir
+        AFTER INSERT ON avaliacao
+        FOR EACH ROW
+        BEGIN
+            INSERT OR IGNORE INTO avaliacao_resumo (material_id) VALUES (NEW.material_id);
+            UPDATE avaliacao_resumo
+            SET soma_notas = soma_notas + NEW.nota, total_avaliacoes = total_avaliacoes + 1
+            WHERE material_id = NEW.material_id;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS avaliacao_resumo_atualizar
+        AFTER UPDATE OF nota, material_id ON avaliacao
+        FOR EACH ROW
+        BEGIN
+            UPDATE avaliacao_resumo
+            SET soma_notas = soma_notas - OLD.nota, total_avaliacoes = total_avaliacoes - 1
+            WHERE material_id = OLD.material_id;
+            INSERT OR IGNORE INTO avaliacao_resumo (material_id) VALUES (NEW.material_id);
+            UPDATE avaliacao_resumo
+            SET soma_notas = soma_notas + NEW.nota, total_avaliacoes = total_avaliacoes + 1
+            WHERE material_id = NEW.material_id;
+            DELETE FROM avaliacao_resumo WHERE material_id = OLD.material_id AND total_avaliacoes = 0;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS avaliacao_resumo_remover
+        AFTER DELETE ON avaliacao
+        FOR EACH ROW
+        BEGIN
+            UPDATE avaliacao_resumo
+            SET soma_notas = soma_notas - OLD.nota, total_avaliacoes = total_avaliacoes - 1
+            WHERE material_id = OLD.material_id;
+            DELETE FROM avaliacao_resumo WHERE material_id = OLD.material_id AND total_avaliacoes = 0;
+        END;
+    """)
+
+    _reconstruir_resumo_avaliacoes(cursor)
+
+
+def _migracao_status_materiais(cursor):
+    # Situação de circulação por material (empréstimos abertos e reservas pendentes).
+    # Materiais sem linha aqui estão disponíveis.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS material_status (
+            material_id INTEGER PRIMARY KEY,
+            emprestimos_abertos INTEGER NOT NULL DEFAULT 0,
+            reservas_pendentes INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (material_id) REFERENCES material_bibliografico (id) ON DELETE CASCADE
+        );
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS material_status_emprestimo_inserir
+        AFTER INSERT ON emprestimo
+        FOR EACH ROW
+        WHEN NEW.data_devolucao_real IS NULL
+        BEGIN
+            INSERT OR IGNORE INTO material_status (material_id) VALUES (NEW.material_id);
+            UPDATE material_status SET emprestimos_abertos = emprestimos_abertos + 1
+            WHERE material_id = NEW.material_id;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS material_status_emprestimo_atualizar
+        AFTER UPDATE OF data_devolucao_real, material_id ON emprestimo
+        FOR EACH ROW
+        BEGIN
+            UPDATE material_status SET emprestimos_abertos = emprestimos_abertos - (OLD.data_devolucao_real IS NULL)
+            WHERE material_id = OLD.material_id;
+            INSERT OR IGNORE INTO material_status (material_id) VALUES (NEW.material_id);
+            UPDATE material_status SET emprestimos_abertos = emprestimos_abertos + (NEW.data_devolucao_real IS NULL)
+            WHERE material_id = NEW.material_id;
+            DELETE FROM material_status
+            WHERE material_id IN (OLD.material_id, NEW.material_id)
+            AND emprestimos_abertos = 0 AND reservas_pendentes = 0;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS material_status_emprestimo_remover
+        AFTER DELETE ON emprestimo
+        FOR EACH ROW
+        WHEN OLD.data_devolucao_real IS NULL
+        BEGIN
+            UPDATE material_status SET emprestimos_abertos = emprestimos_abertos - 1
+            WHERE material_id = OLD.material_id;
+            DELETE FROM material_status
+            WHERE material_id = OLD.material_id AND emprestimos_abertos = 0 AND reservas_pendentes = 0;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS material_status_reserva_inserir
+        AFTER INSERT ON reserva
+        FOR EACH ROW
+        WHEN NEW.status_reserva = 'pendente'
+        BEGIN
+            INSERT OR IGNORE INTO material_status (material_id) VALUES (NEW.material_id);
+            UPDATE material_status SET reservas_pendentes = reservas_pendentes + 1
+            WHERE material_id = NEW.material_id;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS material_status_reserva_atualizar
+        AFTER UPDATE OF status_reserva, material_id ON reserva
+        FOR EACH ROW
+        BEGIN
+            UPDATE material_status SET reservas_pendentes = reservas_pendentes - (OLD.status_reserva = 'pendente')
+            WHERE material_id = OLD.material_id;
+            INSERT OR IGNORE INTO material_status (material_id) VALUES (NEW.material_id);
+            UPDATE material_status SET reservas_pendentes = reservas_pendentes + (NEW.status_reserva = 'pendente')
+            WHERE material_id = NEW.material_id;
+            DELETE FROM material_status
+            WHERE material_id IN (OLD.material_id, NEW.material_id)
+            AND emprestimos_abertos = 0 AND reservas_pendentes = 0;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS material_status_reserva_remover
+        AFTER DELETE ON reserva
+        FOR EACH ROW
+        WHEN OLD.status_reserva = 'pendente'
+        BEGIN
+            UPDATE material_status SET reservas_pendentes = reservas_pendentes - 1
+            WHERE material_id = OLD.material_id;
+            DELETE FROM material_status
+            WHERE material_id = OLD.material_id AND emprestimos_abertos = 0 AND reservas_pendentes = 0;
+        END;
+    """)
+
+    _reconstruir_status_materiais(cursor)
+
+
+def _migracao_busca_textual(cursor):
+    # Índice de busca textual (FTS5). O rowid é o id do material; os campos dos subtipos
+    # (gênero, editora, disciplina) são copiados pelos gatilhos de cada tabela.
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS material_busca USING fts5(
+            titulo, autor, genero, editora, disciplina,
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS material_busca_material_inserir
+        AFTER INSERT ON material_bibliografico
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO material_busca (rowid, titulo, autor) VALUES (NEW.id, NEW.titulo, NEW.autor);
+        END;
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS material_busca_material_atualizar
+        AFTER UPDATE OF titulo, autor ON material_bibliografico
+        FOR EACH ROW
+        BEGIN
+            {_SQL_INDEXAR_BUSCA.format(material_id='NEW.id')}
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS material_busca_material_remover
+        AFTER DELETE ON material_bibliografico
+        FOR EACH ROW
+        BEGIN
+            DELETE FROM material_busca WHERE rowid = OLD.id;
+        END;
+    """)
+
+    # Reindexa o material quando os dados do subtipo mudam
+    for tabela in ('livro', 'ebook', 'revista', 'apostila'):
+        for evento, registro in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS material_busca_{tabela}_{evento.lower()}
+                AFTER {evento} ON {tabela}
+                FOR EACH ROW
+                BEGIN
+                    {_SQL_INDEXAR_BUSCA.format(material_id=f'{registro}.id')}
+                END;
+            """)
+
+    _reconstruir_busca_materiais(cursor)
+
+
+def _migracao_colunas_normalizadas(cursor):
+    # Colunas de busca sem acento e sem caixa, preenchidas por Biblioteca.adicionar_material.
+    # Materiais já existentes são preenchidos aqui.
+    for coluna in ('titulo_normalizado', 'autor_normalizado'):
+        if not _coluna_existe(cursor, 'material_bibliografico', coluna):
+            cursor.execute(f"ALTER TABLE material_bibliografico ADD COLUMN {coluna} TEXT")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_material_titulo_normalizado
+        ON material_bibliografico (titulo_normalizado);
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_material_autor_normalizado
+        ON material_bibliografico (autor_normalizado);
+    """)
+
+    _preencher_colunas_normalizadas(cursor.connection)
+
+
+def _migracao_indices(cursor):
+    # Índices secundários das consultas frequentes da Biblioteca e das chaves estrangeiras
+    # (as exclusões em cascata procuram as linhas filhas por essas colunas)
+    for nome, tabela, colunas in INDICES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({colunas});")
+
+
+def _migracao_indexacao_em_lote(cursor):
+    # Inserções em lote suspendem a indexação linha a linha (uma linha em busca_suspensa,
+    # dentro da própria transação) e indexam o intervalo inserido de uma vez no fim
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS busca_suspensa (
+            suspensa INTEGER PRIMARY KEY CHECK (suspensa = 1)
+        );
+    """)
+
+    cursor.execute("DROP TRIGGER IF EXISTS material_busca_material_inserir")
+    cursor.execute("""
+        CREATE TRIGGER material_busca_material_inserir
+        AFTER INSERT ON material_bibliografico
+        FOR EACH ROW
+        WHEN NOT EXISTS (SELECT 1 FROM busca_suspensa)
+        BEGIN
+            INSERT INTO material_busca (rowid, titulo, autor) VALUES (NEW.id, NEW.titulo, NEW.autor);
+        END;
+    """)
+
+    for tabela in ('livro', 'ebook', 'revista', 'apostila'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS material_busca_{tabela}_insert")
+        cursor.execute(f"""
+            CREATE TRIGGER material_busca_{tabela}_insert
+            AFTER INSERT ON {tabela}
+            FOR EACH ROW
+            WHEN NOT EXISTS (SELECT 1 FROM busca_suspensa)
+            BEGIN
+                {_SQL_INDEXAR_BUSCA.format(material_id='NEW.id')}
+            END;
+        """)
+
+
+def _migracao_indices_paginacao(cursor):
+    # Reaplica INDICES para criar idx_usuario_nome (paginação de usuários por nome);
+    # as demais listagens paginadas já são atendidas pelos índices existentes
+    _migracao_indices(cursor)
+
+
+# A posição na lista é o número da versão; novas migrações entram sempre no fim
+MIGRACOES = [
+    _migracao_tabelas_base,
+    _migracao_resumo_avaliacoes,
+    _migracao_status_materiais,
+    _migracao_busca_textual,
+    _migracao_colunas_normalizadas,
+    _migracao_indices,
+    _migracao_indexacao_em_lote,
+    _migracao_indices_paginacao,
+]
+
+VERSAO_ATUAL = len(MIGRACOES)
+
+
+def _tabela_existe(cursor, nome):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (nome,))
+    return cursor.fetchone() is not None
+
+
+def _coluna_existe(cursor, tabela, coluna):
+    cursor.execute(f"PRAGMA table_info({tabela})")
+    return any(row[1] == coluna for row in cursor.fetchall())
+
+
+def normalizar_texto(texto):
+    # Remove acentos, ignora maiúsculas/minúsculas e espaços repetidos: "Memórias  Póstumas" -> "memorias postumas"
+    if texto is None:
+        return None
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+
+def _preencher_colunas_normalizadas(conn, somente_vazias=True):
+    conn.create_function('normalizar_texto', 1, normalizar_texto, deterministic=True)
+    query = """
+        UPDATE material_bibliografico
+        SET titulo_normalizado = normalizar_texto(titulo),
+            autor_normalizado = normalizar_texto(autor)
+    """
+    if somente_vazias:
+        query += " WHERE titulo_normalizado IS NULL OR autor_normalizado IS NULL"
+    conn.execute(query)
+
+
+def _reconstruir_resumo_avaliacoes(cursor):
+    cursor.execute("DELETE FROM avaliacao_resumo")
+    cursor.execute("""
+        INSERT INTO avaliacao_resumo (material_id, soma_notas, total_avaliacoes)
+        SELECT material_id, SUM(nota), COUNT(*)
+        FROM avaliacao
+        GROUP BY material_id
+    """)
+
+
+def reconstruir_resumo_avaliacoes(db_name='Biblioteca.db'):
+    # Recalcula o resumo a partir da tabela avaliacao (bancos antigos ou divergentes)
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON")
+    _reconstruir_resumo_avaliacoes(cursor)
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+
+def verificar_resumo_avaliacoes(db_name='Biblioteca.db'):
+    # Retorna os materiais cujo resumo diverge da tabela avaliacao
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT material_id, SUM(esperado_soma), SUM(esperado_total), SUM(resumo_soma), SUM(resumo_total)
+        FROM (
+            SELECT material_id, SUM(nota) AS esperado_soma, COUNT(*) AS esperado_total,
+                   0 AS resumo_soma, 0 AS resumo_total
+            FROM avaliacao
+            GROUP BY material_id
+            UNION ALL
+            SELECT material_id, 0, 0, soma_notas, total_avaliacoes
+            FROM avaliacao_resumo
+        )
+        GROUP BY material_id
+        HAVING SUM(esperado_total) != SUM(resumo_total)
+            OR ABS(SUM(esperado_soma) - SUM(resumo_soma)) > 1e-9
+    """)
+    divergencias = cursor.fetchall()
+    conn.close()
+    return divergencias
+
+
+def _reconstruir_status_materiais(cursor):
+    cursor.execute("DELETE FROM material_status")
+    cursor.execute("""
+        INSERT INTO material_status (material_id, emprestimos_abertos, reservas_pendentes)
+        SELECT material_id, SUM(emprestimos_abertos), SUM(reservas_pendentes)
+        FROM (
+            SELECT material_id, COUNT(*) AS emprestimos_abertos, 0 AS reservas_pendentes
+            FROM emprestimo
+            WHERE data_devolucao_real IS NULL
+            GROUP BY material_id
+            UNION ALL
+            SELECT material_id, 0, COUNT(*)
+            FROM reserva
+            WHERE status_reserva = 'pendente'
+            GROUP BY material_id
+        )
+        GROUP BY material_id
+    """)
+
+
+def _reconstruir_busca_materiais(cursor):
+    cursor.execute("DELETE FROM material_busca")
+    cursor.execute(_SQL_LINHAS_BUSCA)
+    cursor.execute("INSERT INTO material_busca (material_busca) VALUES ('optimize')")
+
+
+def indexar_busca_intervalo(cursor, primeiro_id, ultimo_id):
+    # Indexa de uma vez os materiais inseridos com a indexação suspensa (ver busca_suspensa)
+    cursor.execute(_SQL_LINHAS_BUSCA + " WHERE mb.id BETWEEN ? AND ?", (primeiro_id, ultimo_id))
+
+
+def reconstruir_busca_materiais(db_name='Biblioteca.db'):
+    # Reconstrói o índice de busca textual a partir do acervo
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    _reconstruir_busca_materiais(cursor)
+    conn.commit()
+    conn.close()
+
+
+def reconstruir_colunas_normalizadas(db_name='Biblioteca.db'):
+    # Recalcula titulo_normalizado/autor_normalizado de todo o acervo
+    # (por exemplo, após inserções feitas direto em SQL, como em inserir.sql)
+    conn = sqlite3.connect(db_name)
+    _preencher_colunas_normalizadas(conn, somente_vazias=False)
+    conn.commit()
+    conn.close()
+
+
+def reconstruir_status_materiais(db_name='Biblioteca.db'):
+    # Recalcula a situação de circulação a partir de emprestimo e reserva
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON")
+    _reconstruir_status_materiais(cursor)
+    conn.commit()
+    conn.close()
+
+
+def verificar_status_materiais(db_name='Biblioteca.db'):
+    # Retorna os materiais cuja situação registrada diverge de emprestimo e reserva
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT material_id, SUM(esperado_emprestimos), SUM(esperado_reservas),
+               SUM(registrado_emprestimos), SUM(registrado_reservas)
+        FROM (
+            SELECT material_id, COUNT(*) AS esperado_emprestimos, 0 AS esperado_reservas,
+                   0 AS registrado_emprestimos, 0 AS registrado_reservas
+            FROM emprestimo
+            WHERE data_devolucao_real IS NULL
+            GROUP BY material_id
+            UNION ALL
+            SELECT material_id, 0, COUNT(*), 0, 0
+            FROM reserva
+            WHERE status_reserva = 'pendente'
+            GROUP BY material_id
+            UNION ALL
+            SELECT material_id, 0, 0, emprestimos_abertos, reservas_pendentes
+            FROM material_status
+        )
+        GROUP BY material_id
+        HAVING SUM(esperado_emprestimos) != SUM(registrado_emprestimos)
+            OR SUM(esperado_reservas) != SUM(registrado_reservas)
+    """)
+    divergencias = cursor.fetchall()
+    conn.close()
+    return divergencias
+
+
+if __name__ == "__main__":
+    # Uso: python dados.py [migrar|versao|reconstruir|verificar] [arquivo.db]
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'migrar'
+    db_name = sys.argv[2] if len(sys.argv) > 2 else 'Biblioteca.db'
+
+    if comando in ('migrar', 'criar'):
+        conn = sqlite3.connect(db_name)
+        versao_anterior = _versao_banco(conn)
+        conn.close()
+        versao = migrar(db_name)
+        if versao_anterior >= versao:
+            print(f"Banco '{db_name}' já está na versão {versao_anterior}.")
+        else:
+            print(f"Banco '{db_name}' migrado da versão {versao_anterior} para a {versao}.")
+    elif comando == 'versao':
+        conn = sqlite3.connect(db_name)
+        print(f"Banco '{db_name}': versão {_versao_banco(conn)} (atual: {VERSAO_ATUAL}).")
+        conn.close()
+    elif comando == 'reconstruir':
+        criar_tabelas(db_name)
+        reconstruir_resumo_avaliacoes(db_name)
+        reconstruir_status_materiais(db_name)
+        reconstruir_busca_materiais(db_name)
+        reconstruir_colunas_normalizadas(db_name)
+        print(f"Resumo de avaliações, status dos materiais e índices de busca reconstruídos em '{db_name}'.")
+    elif comando == 'verificar':
+        conn = sqlite3.connect(db_name)
+        tabelas_existem = all(_tabela_existe(conn.cursor(), nome) for nome in ('avaliacao_resumo', 'material_status'))
+        conn.close()
+        if not tabelas_existem:
+            print("Tabelas agregadas ausentes. Execute: python dados.py migrar")
+            sys.exit(1)
+
+        consistente = True
+        divergencias = verificar_resumo_avaliacoes(db_name)
+        if divergencias:
+            consistente = False
+            print(f"{len(divergencias)} material(is) com resumo de avaliações divergente:")
+            for material_id, soma, total, resumo_soma, resumo_total in divergencias:
+                print(f" - Material {material_id}: esperado {total} nota(s) / soma {soma}, "
+                      f"resumo {resumo_total} nota(s) / soma {resumo_soma}")
+
+        divergencias = verificar_status_materiais(db_name)
+        if divergencias:
+            consistente = False
+            print(f"{len(divergencias)} material(is) com status divergente:")
+            for material_id, emprestimos, reservas, reg_emprestimos, reg_reservas in divergencias:
+                print(f" - Material {material_id}: esperado {emprestimos} empréstimo(s) / {reservas} reserva(s), "
+                      f"registrado {reg_emprestimos} empréstimo(s) / {reg_reservas} reserva(s)")
+
+        if not consistente:
+            sys.exit(1)
+        print("Tabelas agregadas consistentes.")
+    else:
+        print(f"Comando desconhecido: {comando}")
+        sys.exit(2)
\ No newline at end of file
@@ -0,0 +1,110 @@
+import csv
+import json
+import sqlite3
+import sys
+import time
+from Biblioteca import Biblioteca
+
+CONSULTA_EMPRESTIMOS = """
+    SELECT id, usuario_id, material_id, data_emprestimo,
+           data_devolucao_prevista, data_devolucao_real
+    FROM emprestimo
+    ORDER BY id
+"""
+
+CONSULTA_RESENHAS = """
+    SELECT id, usuario_id, material_id, texto_resenha, data_resenha
+    FROM resenha
+    ORDER BY id
+"""
+
+
+def _consultar(conn, query, params=(), tamanho_lote=1000, converter=dict):
+    # Cursor próprio lido em blocos: no máximo tamanho_lote linhas na memória. Retorna as
+    # colunas da consulta (cabeçalho mesmo sem linhas) e o gerador das linhas. Diferente de
+    # Biblioteca._iterar, um erro do SQLite no meio da leitura é propagado, para que a
+    # exportação falhe em vez de dar um arquivo truncado como completo.
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+    except sqlite3.Error:
+        cursor.close()
+        raise
+    colunas = [descricao[0] for descricao in cursor.description]
+
+    def linhas():
+        try:
+            while True:
+                bloco = cursor.fetchmany(tamanho_lote)
+                if not bloco:
+                    break
+                for row in bloco:
+                    yield converter(row)
+        finally:
+            cursor.close()
+
+    return colunas, linhas()
+
+
+def _escrever(colunas, linhas, caminho):
+    # Grava as linhas em CSV ou JSONL conforme a extensão; retorna quantas foram gravadas
+    total = 0
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        if caminho.endswith('.jsonl'):
+            for linha in linhas:
+                arquivo.write(json.dumps(linha, ensure_ascii=False) + '\n')
+                total += 1
+        elif caminho.endswith('.csv'):
+            escritor = csv.DictWriter(arquivo, fieldnames=colunas)
+            escritor.writeheader()
+            for linha in linhas:
+                escritor.writerow(linha)
+                total += 1
+        else:
+            raise ValueError("Formato não suportado: use .csv ou .jsonl")
+    return total
+
+
+def exportar_acervo(biblioteca, caminho, tamanho_lote=1000):
+    query, params = biblioteca._consulta_acervo()
+    # A conexão de leitura fica com a exportação até a última linha ser gravada
+    with biblioteca._leitura() as conn:
+        return _escrever(*_consultar(conn, query, params, tamanho_lote, biblioteca._material_com_nota),
+                         caminho)
+
+
+def exportar_emprestimos(biblioteca, caminho, tamanho_lote=1000):
+    with biblioteca._leitura() as conn:
+        return _escrever(*_consultar(conn, CONSULTA_EMPRESTIMOS, (), tamanho_lote), caminho)
+
+
+def exportar_resenhas(biblioteca, caminho, tamanho_lote=1000):
+    with biblioteca._leitura() as conn:
+        return _escrever(*_consultar(conn, CONSULTA_RESENHAS, (), tamanho_lote), caminho)
+
+
+EXPORTACOES = {
+    'acervo': exportar_acervo,
+    'emprestimos': exportar_emprestimos,
+    'resenhas': exportar_resenhas,
+}
+
+
+if __name__ == "__main__":
+    # Uso: python exportador.py [acervo|emprestimos|resenhas] arquivo.(csv|jsonl) [arquivo.db]
+    if len(sys.argv) < 3 or sys.argv[1] not in EXPORTACOES:
+        print("Uso: python exportador.py [acervo|emprestimos|resenhas] arquivo.(csv|jsonl) [arquivo.db]")
+        sys.exit(2)
+    tabela, caminho = sys.argv[1], sys.argv[2]
+    db_name = sys.argv[3] if len(sys.argv) > 3 else 'Biblioteca.db'
+
+    biblioteca = Biblioteca(db_name, perfil='read-only-report')
+    inicio = time.perf_counter()
+    try:
+        total = EXPORTACOES[tabela](biblioteca, caminho)
+    except sqlite3.Error as e:
+        print(f"Erro ao exportar {tabela}: {e}. O arquivo {caminho} está incompleto.")
+        sys.exit(1)
+    finally:
+        biblioteca.close()
+    print(f"{total} registro(s) de {tabela} exportados para {caminho} em {time.perf_counter() - inicio:.2f}s.")
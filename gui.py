@@ -1,26 +1,56 @@
 # gui.py
+import time
+# Marco zero do relatório de inicialização (python gui.py --tempos)
+_INICIO_PROCESSO = time.perf_counter()
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QStackedWidget, QPushButton, QLabel,
     QVBoxLayout, QGridLayout, QHBoxLayout, QLineEdit, QMessageBox,
     QTableWidget, QTableWidgetItem, QHeaderView, QSpacerItem, QSizePolicy,
     QComboBox, QGroupBox, QListWidget, QListWidgetItem, QRadioButton,
-    QDialog, QDialogButtonBox, QTextEdit
+    QDialog, QDialogButtonBox, QTextEdit, QTableView, QAbstractItemView
 )
-from PyQt5.QtGui import QFont, QPixmap
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtGui import QFont, QPixmap, QCursor
+from PyQt5.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
 from functools import partial
-import os
 import re
 from datetime import datetime, timedelta
 
 # Importe suas classes de lógica de negócio
 from Biblioteca import Biblioteca
+from ExecutorBanco import ExecutorBanco, PonteEventos
+from BarramentoEventos import (MaterialAdicionado, MateriaisAdicionados, MaterialRemovido, EmprestimoAberto,
+                               EmprestimoFechado, ReservaAlterada, ResenhaAlterada, UsuarioRemovido)
 from MaterialBibliografico import Livro, Ebook, Revista, Apostila, Trabalho, Resenha
 from dados import criar_tabelas
 
 DB_NAME = 'Biblioteca.db'
 
+# Tempo máximo, em segundos, do início do processo até a tela de login desenhada; o
+# relatório de --tempos avisa quando é ultrapassado (terminais leves são o caso a vigiar)
+ORCAMENTO_INICIALIZACAO = 1.0
+
+# Etapas da inicialização como (etapa, segundos desde a etapa anterior), na ordem
+TEMPOS_INICIALIZACAO = []
+_ultima_marca = [_INICIO_PROCESSO]
+
+
+def marcar_inicializacao(etapa):
+    agora = time.perf_counter()
+    TEMPOS_INICIALIZACAO.append((etapa, agora - _ultima_marca[0]))
+    _ultima_marca[0] = agora
+
+
+def relatorio_inicializacao():
+    linhas = ["=== Inicialização ==="]
+    for etapa, segundos in TEMPOS_INICIALIZACAO:
+        linhas.append(f"{etapa:<24} {segundos * 1000:8.1f} ms")
+    total = sum(segundos for _, segundos in TEMPOS_INICIALIZACAO)
+    situacao = "ULTRAPASSADO" if total > ORCAMENTO_INICIALIZACAO else "ok"
+    linhas.append(f"{'total':<24} {total * 1000:8.1f} ms "
+                  f"(orçamento {ORCAMENTO_INICIALIZACAO * 1000:.0f} ms: {situacao})")
+    return '\n'.join(linhas)
+
 # === PALETA DE CORES ===
 PRIMARY_COLOR = "#9B27B0"
 PRIMARY_LIGHT = "#BA68C8"
@@ -43,7 +73,7 @@ WARNING_COLOR = "#FFC107"
 ERROR_COLOR = "#F44336"
 
 class LoanDialog(QDialog):
-    def __init__(self, biblioteca, parent=None):
+    def __init__(self, biblioteca, executor, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Registrar empréstimo")
         self.biblioteca = biblioteca
@@ -58,10 +88,10 @@ class LoanDialog(QDialog):
         self.user_combo = QComboBox()
         self.user_combo.setStyleSheet("background-color: white; border: 1px solid #D1D1D1; border-radius: 8px; padding: 4px;")
         
-        users = self.biblioteca.listar_usuarios()
-        if users:
-            for user in users:
-                self.user_combo.addItem(f"{user['nome']} ({user['email']})", userData=user['id'])
+        # A lista de usuários chega em segundo plano; o diálogo já abre
+        self.user_combo.setEnabled(False)
+        executor.executar(self.biblioteca.listar_usuarios, ao_concluir=self.preencher_usuarios,
+                          chave='usuarios_emprestimo')
 
         # Seleção de duração do empréstimo
         duration_label = QLabel("Duração do empréstimo:")
@@ -91,6 +121,12 @@ class LoanDialog(QDialog):
         
         self.setLayout(main_layout)
 
+    def preencher_usuarios(self, users):
+        if users:
+            for user in users:
+                self.user_combo.addItem(f"{user['nome']} ({user['email']})", userData=user['id'])
+        self.user_combo.setEnabled(True)
+
     def get_loan_details(self):
         self.user_id = self.user_combo.currentData()
         if self.radio_30.isChecked():
@@ -222,7 +258,11 @@ class ResetPasswordScreen(QWidget):
             QMessageBox.warning(self, "Erro", "A nova senha e a confirmação de senha não coincidem.")
             return
 
-        if self.biblioteca.resetar_senha(email, new_password):
+        self.main_app.executor.executar(self.biblioteca.resetar_senha, email, new_password,
+                                        ao_concluir=self.senha_redefinida)
+
+    def senha_redefinida(self, sucesso):
+        if sucesso:
             QMessageBox.information(self, "Sucesso", "Sua senha foi redefinida com sucesso.")
             self.main_app.switch_to_screen(self.main_app.LOGIN_INDEX)
         else:
@@ -315,16 +355,20 @@ class LoginScreen(QWidget):
         senha = self.password_input.text()
         
         if email and senha:
-            user_id = self.biblioteca.login_usuario(email, senha)
-            if user_id:
-                QMessageBox.information(self, "Sucesso", "Login bem-sucedido!")
-                self.main_app.usuario_logado_id = user_id
-                self.main_app.switch_to_screen(self.main_app.MAIN_MENU_INDEX)
-            else:
-                QMessageBox.warning(self, "Erro", "E-mail ou senha incorretos.")
+            # bcrypt leva centenas de milissegundos: a verificação roda em segundo plano
+            self.main_app.executor.executar(self.biblioteca.login_usuario, email, senha,
+                                            ao_concluir=self.login_concluido, chave='login')
         else:
             QMessageBox.warning(self, "Aviso", "E-mail e senha são obrigatórios.")
 
+    def login_concluido(self, user_id):
+        if user_id:
+            QMessageBox.information(self, "Sucesso", "Login bem-sucedido!")
+            self.main_app.usuario_logado_id = user_id
+            self.main_app.switch_to_screen(self.main_app.MAIN_MENU_INDEX)
+        else:
+            QMessageBox.warning(self, "Erro", "E-mail ou senha incorretos.")
+
 class RegisterScreen(QWidget):
     def __init__(self, main_app, biblioteca_manager):
         super().__init__()
@@ -402,7 +446,10 @@ class RegisterScreen(QWidget):
             QMessageBox.warning(self, "Aviso", "Por favor, insira um e-mail válido.")
             return
         
-        sucesso = self.biblioteca.cadastrar_usuario(nome, email, senha)
+        self.main_app.executor.executar(self.biblioteca.cadastrar_usuario, nome, email, senha,
+                                        ao_concluir=partial(self.cadastro_concluido, nome))
+
+    def cadastro_concluido(self, nome, sucesso):
         if sucesso:
             QMessageBox.information(self, "Sucesso", f"Usuário {nome} cadastrado com sucesso!")
             self.nome_input.clear()
@@ -577,15 +624,191 @@ class AddMaterialScreen(QWidget):
             material = Resenha(user_id, autor, titulo, ano_int)
         
         if material:
-            self.biblioteca.adicionar_material(material)
-            QMessageBox.information(self, "Sucesso", f"Material '{titulo}' adicionado com sucesso!")
-            for field in self.fields.values():
-                field.clear()
-            self.main_app.acervo_screen.refresh_acervo()
+            self.main_app.executor.executar(self.biblioteca.adicionar_material, material,
+                                            ao_concluir=lambda _: self.material_adicionado(titulo))
         else:
             QMessageBox.warning(self, "Erro", "Tipo de material inválido ou erro na criação.")
 
+    def material_adicionado(self, titulo):
+        QMessageBox.information(self, "Sucesso", f"Material '{titulo}' adicionado com sucesso!")
+        for field in self.fields.values():
+            field.clear()
+
+class AcervoModel(QAbstractTableModel):
+    # Acervo paginado sob demanda: a view pede mais linhas (canFetchMore/fetchMore) conforme
+    # a rolagem chega ao fim, e só as células visíveis são desenhadas. Filtro e ordenação
+    # são feitos no SQL por Biblioteca.paginar_acervo_com_status. A primeira página é curta
+    # para aparecer logo; com filtro, as seguintes continuam vindo sozinhas até
+    # LIMITE_CARREGAMENTO_BUSCA linhas (depois disso, pela rolagem).
+    COLUNAS = [('id', "ID"), ('titulo', "Título"), ('autor', "Autor"), ('categoria', "Categoria"), ('status', "Status")]
+    TAMANHO_PRIMEIRA_PAGINA = 50
+    TAMANHO_PAGINA = 200
+    LIMITE_CARREGAMENTO_BUSCA = 2000
+
+    # Emitido a cada página recebida (a primeira e as seguintes)
+    carregado = pyqtSignal()
+
+    def __init__(self, biblioteca, executor, parent=None):
+        super().__init__(parent)
+        self.biblioteca = biblioteca
+        self.executor = executor
+        self.materiais = []
+        self.filtro = None
+        self.ordenar_por = 'id'
+        self.decrescente = False
+        self._token = None
+        self._carregado = False
+        self._buscando = False
+
+    def recarregar(self, filtro=None, ao_concluir=None):
+        # Volta para a primeira página (com o filtro dado) mantendo a ordenação atual. As
+        # páginas vêm em segundo plano; ao_concluir recebe o número de linhas carregadas.
+        self.filtro = filtro
+        self._carregado = True
+        self._buscar_pagina(None, self.TAMANHO_PRIMEIRA_PAGINA, partial(self._pagina_inicial, ao_concluir))
+
+    def _buscar_pagina(self, token, tamanho, ao_concluir):
+        # Mesma chave para todas as páginas do modelo: recarregar ou reordenar descarta
+        # a página que ainda estava a caminho (uma busca digitada supera a anterior)
+        self._buscando = True
+        self.executor.executar(self.biblioteca.paginar_acervo_com_status, self.filtro, self.ordenar_por,
+                               self.decrescente, tamanho, token,
+                               ao_concluir=ao_concluir, chave=('acervo', id(self)))
+
+    def _continuar_busca(self):
+        if self.filtro is not None and len(self.materiais) < self.LIMITE_CARREGAMENTO_BUSCA:
+            self.fetchMore()
+
+    def tem_mais(self):
+        return self._token is not None
+
+    def _pagina_inicial(self, ao_concluir, pagina):
+        materiais, token = pagina or ([], None)
+        self.beginResetModel()
+        self.materiais = materiais
+        self._token = token
+        self._buscando = False
+        self.endResetModel()
+        self.carregado.emit()
+        if ao_concluir:
+            ao_concluir(len(self.materiais))
+        self._continuar_busca()
+
+    def _pagina_seguinte(self, pagina):
+        materiais, self._token = pagina or ([], None)
+        self._buscando = False
+        if materiais:
+            self.beginInsertRows(QModelIndex(), len(self.materiais), len(self.materiais) + len(materiais) - 1)
+            self.materiais.extend(materiais)
+            self.endInsertRows()
+        self.carregado.emit()
+        self._continuar_busca()
+
+    def material(self, row):
+        return self.materiais[row]
+
+    def linha_do_material(self, material_id):
+        for linha, material in enumerate(self.materiais):
+            if material['id'] == material_id:
+                return linha
+        return None
+
+    def aplicar_evento(self, evento):
+        # Corrige só as linhas afetadas por uma escrita, em vez de recarregar o acervo
+        if not self._carregado:
+            return
+        if isinstance(evento, (EmprestimoAberto, EmprestimoFechado, ReservaAlterada)):
+            self._atualizar_status(evento.material_id)
+        elif isinstance(evento, MaterialRemovido):
+            self._remover_linha(evento.material_id)
+        elif isinstance(evento, MaterialAdicionado):
+            self._inserir_material(evento.material_id)
+        elif isinstance(evento, (MateriaisAdicionados, UsuarioRemovido)):
+            # Muitas linhas novas, ou status mudados em cascata: aí sim recarrega
+            self.recarregar(self.filtro)
+
+    def _atualizar_status(self, material_id):
+        if self.linha_do_material(material_id) is None:
+            return
+        self.executor.executar(self.biblioteca.verificar_status_material, material_id,
+                               ao_concluir=partial(self._status_recebido, material_id),
+                               chave=('status', id(self), material_id))
+
+    def _status_recebido(self, material_id, status):
+        # A linha pode ter mudado de posição (ou saído) enquanto o status era lido
+        linha = self.linha_do_material(material_id)
+        if linha is None:
+            return
+        self.materiais[linha]['status'] = status
+        indice = self.index(linha, len(self.COLUNAS) - 1)
+        self.dataChanged.emit(indice, indice)
+
+    def _remover_linha(self, material_id):
+        linha = self.linha_do_material(material_id)
+        if linha is not None:
+            self.beginRemoveRows(QModelIndex(), linha, linha)
+            del self.materiais[linha]
+            self.endRemoveRows()
+
+    def _inserir_material(self, material_id):
+        # Só quando a posição é conhecida: sem filtro, em ordem de id e com a ponta onde
+        # os ids novos entram já carregada; nos outros casos ele aparece ao recarregar
+        if self.filtro is not None or self.ordenar_por != 'id' or (not self.decrescente and self.tem_mais()):
+            return
+        self.executor.executar(self.biblioteca.buscar_materiais_por_ids, [material_id],
+                               ao_concluir=partial(self._material_recebido, material_id))
+
+    def _material_recebido(self, material_id, materiais):
+        material = (materiais or {}).get(material_id)
+        if not material or self.linha_do_material(material_id) is not None:
+            return
+        linha = 0 if self.decrescente else len(self.materiais)
+        self.beginInsertRows(QModelIndex(), linha, linha)
+        self.materiais.insert(linha, {campo: material[campo] for campo, _ in self.COLUNAS})
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.materiais)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUNAS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        valor = self.materiais[index.row()][self.COLUNAS[index.column()][0]]
+        return "" if valor is None else str(valor)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUNAS[section][1]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._token is not None and not self._buscando
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._buscar_pagina(self._token, self.TAMANHO_PAGINA, self._pagina_seguinte)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        campo = self.COLUNAS[column][0]
+        # Status é calculado, não tem índice para ordenar
+        if campo not in self.biblioteca.ORDENACOES_ACERVO:
+            return
+        self.ordenar_por = campo
+        self.decrescente = order == Qt.DescendingOrder
+        # A view ordena ao ser montada; a primeira consulta fica para o primeiro recarregar()
+        if self._carregado:
+            self.recarregar(self.filtro)
+
+
 class AcervoScreen(QWidget):
+    # Busca enquanto digita: espera ESPERA_DIGITACAO_MS sem teclas novas e pelo menos
+    # MINIMO_CARACTERES (o botão Buscar aceita qualquer tamanho)
+    ESPERA_DIGITACAO_MS = 300
+    MINIMO_CARACTERES = 2
+
     def __init__(self, main_app, biblioteca_manager):
         super().__init__()
         self.main_app = main_app
@@ -614,14 +837,32 @@ class AcervoScreen(QWidget):
         clear_button.setStyleSheet(f"background-color: {ACCENT_BG_COLOR}; color: {ACCENT_TEXT_COLOR}; border-radius: 12px; padding: 8px;")
         clear_button.clicked.connect(self.refresh_acervo)
         
+        self.search_input.returnPressed.connect(self.search_materials)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.ESPERA_DIGITACAO_MS)
+        self.search_timer.timeout.connect(self.busca_digitada)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        
         search_layout.addWidget(self.search_input)
         search_layout.addWidget(search_button)
         search_layout.addWidget(clear_button)
         main_layout.addLayout(search_layout)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["ID", "Título", "Autor", "Categoria", "Status"])
+        self.result_label = QLabel("")
+        self.result_label.setStyleSheet(f"color: {TEXT_COLOR}; background-color: transparent;")
+        main_layout.addWidget(self.result_label)
+
+        self.model = AcervoModel(self.biblioteca, self.main_app.executor, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.model.carregado.connect(self.exibir_total)
+        self.main_app.eventos.evento.connect(self.model.aplicar_evento)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
+        self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setStyleSheet(f"background-color: white; selection-background-color: {SECONDARY_LIGHT}; border: 1px solid #CCCCCC;")
         main_layout.addWidget(self.table)
@@ -664,37 +905,37 @@ class AcervoScreen(QWidget):
 
     def refresh_acervo(self):
         self.search_input.clear()
-        self.table.setRowCount(0)
-        materiais = self.biblioteca.listar_acervo_com_status()
-        if materiais:
-            self.table.setRowCount(len(materiais))
-            for i, material in enumerate(materiais):
-                self.table.setItem(i, 0, QTableWidgetItem(str(material['id'])))
-                self.table.setItem(i, 1, QTableWidgetItem(material['titulo']))
-                self.table.setItem(i, 2, QTableWidgetItem(material['autor']))
-                self.table.setItem(i, 3, QTableWidgetItem(material['categoria']))
-                self.table.setItem(i, 4, QTableWidgetItem(material['status']))
+        self.search_timer.stop()
+        self.model.recarregar()
 
     def search_materials(self):
+        self.search_timer.stop()
         query = self.search_input.text()
-        self.table.setRowCount(0)
         if query:
-            materiais = self.biblioteca.buscar_materiais_titulo(query)
-            if materiais:
-                self.table.setRowCount(len(materiais))
-                for i, material in enumerate(materiais):
-                    self.table.setItem(i, 0, QTableWidgetItem(str(material['id'])))
-                    self.table.setItem(i, 1, QTableWidgetItem(material['titulo']))
-                    self.table.setItem(i, 2, QTableWidgetItem(material['autor']))
-                    self.table.setItem(i, 3, QTableWidgetItem(material['categoria']))
-                    # status
-                    status = self.biblioteca.verificar_status_material(material['id'])
-                    self.table.setItem(i, 4, QTableWidgetItem(status))
-
-            else:
-                QMessageBox.information(self, "Aviso", f"Nenhum material encontrado com o título: '{query}'")
+            self.model.recarregar(filtro=query, ao_concluir=partial(self.busca_concluida, query))
         else:
             self.refresh_acervo()
+
+    def busca_digitada(self):
+        # Sem caixa de aviso: o resultado aparece em result_label enquanto a pessoa digita
+        query = self.search_input.text().strip()
+        if not query:
+            self.model.recarregar()
+        elif len(query) >= self.MINIMO_CARACTERES:
+            self.model.recarregar(filtro=query)
+
+    def exibir_total(self):
+        total = self.model.rowCount()
+        if self.model.filtro is None:
+            self.result_label.setText("")
+        elif not total:
+            self.result_label.setText(f"Nenhum material encontrado com o título: '{self.model.filtro}'")
+        else:
+            self.result_label.setText(f"{total}{'+' if self.model.tem_mais() else ''} material(is) encontrado(s)")
+
+    def busca_concluida(self, query, total):
+        if not total:
+            QMessageBox.information(self, "Aviso", f"Nenhum material encontrado com o título: '{query}'")
             
     def remove_material(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -707,12 +948,16 @@ class AcervoScreen(QWidget):
 
         if reply == QMessageBox.Yes:
             row = selected_rows[0].row()
-            material_id = int(self.table.item(row, 0).text())
-            if self.biblioteca.remover_material(material_id):
-                QMessageBox.information(self, "Sucesso", "Material removido com sucesso!")
-                self.refresh_acervo()
-            else:
-                QMessageBox.critical(self, "Erro", "Não foi possível remover o material.")
+            material_id = self.model.material(row)['id']
+            self.main_app.executor.executar(self.biblioteca.remover_material, material_id,
+                                            ao_concluir=self.material_removido)
+
+    def material_removido(self, sucesso):
+        if sucesso:
+            # A linha sai da tabela pelo evento MaterialRemovido
+            QMessageBox.information(self, "Sucesso", "Material removido com sucesso!")
+        else:
+            QMessageBox.critical(self, "Erro", "Não foi possível remover o material.")
     
     def borrow_material(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -721,11 +966,11 @@ class AcervoScreen(QWidget):
             return
         
         row = selected_rows[0].row()
-        material_id = int(self.table.item(row, 0).text())
-        status = self.table.item(row, 4).text()
+        material_id = self.model.material(row)['id']
+        status = self.model.material(row)['status']
 
         if status == "Disponível":
-            loan_dialog = LoanDialog(self.biblioteca, self)
+            loan_dialog = LoanDialog(self.biblioteca, self.main_app.executor, self)
             if loan_dialog.exec_() == QDialog.Accepted:
                 user_id, duration_days = loan_dialog.get_loan_details()
                 
@@ -735,14 +980,17 @@ class AcervoScreen(QWidget):
 
                 data_devolucao_prevista = (datetime.now() + timedelta(days=duration_days)).strftime('%Y-%m-%d %H:%M:%S')
 
-                if self.biblioteca.registrar_emprestimo(user_id, material_id, data_devolucao_prevista):
-                    QMessageBox.information(self, "Sucesso", "Empréstimo registrado com sucesso!")
-                    self.refresh_acervo()
-                else:
-                    QMessageBox.critical(self, "Erro", "Não foi possível registrar o empréstimo.")
+                self.main_app.executor.executar(self.biblioteca.registrar_emprestimo, user_id, material_id,
+                                                data_devolucao_prevista, ao_concluir=self.emprestimo_registrado)
         else:
             QMessageBox.warning(self, "Aviso", "Este material não está disponível para empréstimo.")
 
+    def emprestimo_registrado(self, sucesso):
+        if sucesso:
+            QMessageBox.information(self, "Sucesso", "Empréstimo registrado com sucesso!")
+        else:
+            QMessageBox.critical(self, "Erro", "Não foi possível registrar o empréstimo.")
+
     def return_material(self):
         selected_rows = self.table.selectionModel().selectedRows()
         if not selected_rows:
@@ -750,26 +998,39 @@ class AcervoScreen(QWidget):
             return
         
         row = selected_rows[0].row()
-        material_id = int(self.table.item(row, 0).text())
-        status = self.table.item(row, 4).text()
+        material_id = self.model.material(row)['id']
+        status = self.model.material(row)['status']
         
         if status == "Emprestado":
-            emprestimo = self.biblioteca.buscar_emprestimo_aberto_material(material_id)
-            if emprestimo:
-                borrower_info = self.biblioteca.buscar_usuario(emprestimo['usuario_id'])
-                reply = QMessageBox.question(self, "Confirmação de devolução", 
-                                             f"Confirmar a devolução do material pelo usuário '{borrower_info['nome']}'?",
-                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-                if reply == QMessageBox.Yes:
-                    if self.biblioteca.registrar_devolucao(emprestimo['id']):
-                        QMessageBox.information(self, "Sucesso", "Devolução registrada com sucesso!")
-                        self.refresh_acervo()
-                    else:
-                        QMessageBox.critical(self, "Erro", "Não foi possível registrar a devolução.")
-            else:
-                QMessageBox.critical(self, "Erro", "Não foi possível encontrar um empréstimo em aberto para este material.")
+            self.main_app.executor.executar(self._emprestimo_e_usuario, material_id,
+                                            ao_concluir=self.confirmar_devolucao, chave='devolucao')
         else:
             QMessageBox.warning(self, "Aviso", "Este material não pode ser devolvido, pois não está emprestado.")
+
+    def _emprestimo_e_usuario(self, material_id):
+        # Roda em segundo plano: o empréstimo em aberto e quem está com o material
+        emprestimo = self.biblioteca.buscar_emprestimo_aberto_material(material_id)
+        if not emprestimo:
+            return None, None
+        return emprestimo, self.biblioteca.buscar_usuario(emprestimo['usuario_id'])
+
+    def confirmar_devolucao(self, resultado):
+        emprestimo, borrower_info = resultado
+        if emprestimo:
+            reply = QMessageBox.question(self, "Confirmação de devolução", 
+                                         f"Confirmar a devolução do material pelo usuário '{borrower_info['nome']}'?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                self.main_app.executor.executar(self.biblioteca.registrar_devolucao, emprestimo['id'],
+                                                ao_concluir=self.devolucao_registrada)
+        else:
+            QMessageBox.critical(self, "Erro", "Não foi possível encontrar um empréstimo em aberto para este material.")
+
+    def devolucao_registrada(self, sucesso):
+        if sucesso:
+            QMessageBox.information(self, "Sucesso", "Devolução registrada com sucesso!")
+        else:
+            QMessageBox.critical(self, "Erro", "Não foi possível registrar a devolução.")
     
     def write_review(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -778,7 +1039,7 @@ class AcervoScreen(QWidget):
             return
 
         row = selected_rows[0].row()
-        material_id = int(self.table.item(row, 0).text())
+        material_id = self.model.material(row)['id']
 
         review_dialog = ReviewDialog(self)
         if review_dialog.exec_() == QDialog.Accepted:
@@ -787,14 +1048,18 @@ class AcervoScreen(QWidget):
 
             user_id = self.main_app.usuario_logado_id
 
-            # Adicionar avaliação
-            self.biblioteca.avaliar_material(user_id, material_id, rating)
+            self.main_app.executor.executar(self._salvar_resenha, user_id, material_id, rating, review_text,
+                                            ao_concluir=self.resenha_salva)
 
-            # Adicionar resenha
-            self.biblioteca.escrever_resenha(user_id, material_id, review_text)
+    def _salvar_resenha(self, user_id, material_id, rating, review_text):
+        # Adicionar avaliação
+        self.biblioteca.avaliar_material(user_id, material_id, rating)
 
-            QMessageBox.information(self, "Sucesso", "Resenha e avaliação salvas com sucesso!")
-            self.main_app.user_profile_screen.refresh_profile()
+        # Adicionar resenha
+        self.biblioteca.escrever_resenha(user_id, material_id, review_text)
+
+    def resenha_salva(self, _):
+        QMessageBox.information(self, "Sucesso", "Resenha e avaliação salvas com sucesso!")
     
     def show_details(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -803,7 +1068,7 @@ class AcervoScreen(QWidget):
             return
         
         row = selected_rows[0].row()
-        material_id = int(self.table.item(row, 0).text())
+        material_id = self.model.material(row)['id']
         self.main_app.material_details_screen.load_details(material_id)
         self.main_app.switch_to_screen(self.main_app.MATERIAL_DETAILS_INDEX)
 
@@ -815,6 +1080,12 @@ class MaterialDetailsScreen(QWidget):
         self.biblioteca = biblioteca_manager
         self.material_id = None
         self.setup_ui()
+        self.main_app.eventos.evento.connect(self.aplicar_evento)
+
+    def aplicar_evento(self, evento):
+        # Resenha nova, editada ou removida do material aberto: recarrega só ele
+        if isinstance(evento, ResenhaAlterada) and evento.material_id == self.material_id:
+            self.load_details(self.material_id)
     
     def setup_ui(self):
         main_layout = QVBoxLayout()
@@ -856,7 +1127,18 @@ class MaterialDetailsScreen(QWidget):
         for i in reversed(range(self.details_layout.count())): 
             self.details_layout.itemAt(i).widget().setParent(None)
         
+        self.main_app.executor.executar(self._material_e_resenhas, material_id,
+                                        ao_concluir=self.exibir_detalhes, chave='detalhes_material')
+
+    def _material_e_resenhas(self, material_id):
+        # Roda em segundo plano: o material e, se ele existir, as resenhas
         material = self.biblioteca.buscar_material_por_id(material_id)
+        if not material:
+            return None, None
+        return material, self.biblioteca.listar_resenhas_material(material_id)
+
+    def exibir_detalhes(self, resultado):
+        material, reviews = resultado
         if material:
             self.title_label.setText(f"Detalhes: {material['titulo']}")
             
@@ -866,7 +1148,6 @@ class MaterialDetailsScreen(QWidget):
             
             # Limpa a lista de resenhas anteriores e carrega novas
             self.reviews_list.clear()
-            reviews = self.biblioteca.listar_resenhas_material(material_id)
             if reviews:
                 for review in reviews:
                     item_text = f"Por {review['nome']}: '{review['texto_resenha']}'"
@@ -906,7 +1187,10 @@ class RecommendationScreen(QWidget):
 
     def refresh_recommendations(self):
         self.table.setRowCount(0)
-        recommendations = self.biblioteca.recomendar_por_genero(self.main_app.usuario_logado_id)
+        self.main_app.executor.executar(self.biblioteca.recomendar_por_genero, self.main_app.usuario_logado_id,
+                                        ao_concluir=self.exibir_recomendacoes, chave='recomendacoes')
+
+    def exibir_recomendacoes(self, recommendations):
         if recommendations:
             self.table.setRowCount(len(recommendations))
             for i, rec in enumerate(recommendations):
@@ -924,6 +1208,16 @@ class UserProfileScreen(QWidget):
         self.main_app = main_app
         self.biblioteca = biblioteca_manager
         self.setup_ui()
+        self.main_app.eventos.evento.connect(self.aplicar_evento)
+
+    def aplicar_evento(self, evento):
+        # O perfil só mostra dados do usuário logado; eventos de outros usuários são ignorados
+        if isinstance(evento, (EmprestimoAberto, EmprestimoFechado, ResenhaAlterada)):
+            if evento.usuario_id == self.main_app.usuario_logado_id:
+                self.refresh_profile()
+        elif isinstance(evento, MaterialRemovido) and self.main_app.usuario_logado_id:
+            # Empréstimos e resenhas do material saem junto com ele (ON DELETE CASCADE)
+            self.refresh_profile()
 
     def setup_ui(self):
         main_layout = QVBoxLayout()
@@ -987,28 +1281,36 @@ class UserProfileScreen(QWidget):
     def refresh_profile(self):
         user_id = self.main_app.usuario_logado_id
         if user_id:
-            user_info = self.biblioteca.buscar_usuario(user_id)
-            if user_info:
-                self.user_name_label.setText(f"Nome: {user_info['nome']}")
-                self.user_email_label.setText(f"Email: {user_info['email']}")
-            
-            # Atualiza a lista de empréstimos
-            self.borrowed_list.clear()
-            borrowed_items = self.biblioteca.listar_emprestimos_usuario(user_id)
-            if borrowed_items:
-                for item in borrowed_items:
-                    item_text = f"Título: {item['titulo']}\nDevolução prevista: {item['data_devolucao_prevista']}"
-                    self.borrowed_list.addItem(QListWidgetItem(item_text))
-
-            # Atualiza a lista de resenhas
-            self.reviews_list.clear()
-            reviews = self.biblioteca.listar_resenhas_usuario(user_id)
-            if reviews:
-                for review in reviews:
-                    item_text = f"Título: {review['titulo']}\nResenha: {review['texto_resenha']}"
-                    item = QListWidgetItem(item_text)
-                    item.setData(Qt.UserRole, review['material_id'])
-                    self.reviews_list.addItem(item)
+            self.main_app.executor.executar(self._dados_perfil, user_id, ao_concluir=self.exibir_perfil,
+                                            chave='perfil')
+
+    def _dados_perfil(self, user_id):
+        # Roda em segundo plano: as três consultas do perfil na mesma tarefa
+        return (self.biblioteca.buscar_usuario(user_id),
+                self.biblioteca.listar_emprestimos_usuario(user_id),
+                self.biblioteca.listar_resenhas_usuario(user_id))
+
+    def exibir_perfil(self, resultado):
+        user_info, borrowed_items, reviews = resultado
+        if user_info:
+            self.user_name_label.setText(f"Nome: {user_info['nome']}")
+            self.user_email_label.setText(f"Email: {user_info['email']}")
+
+        # Atualiza a lista de empréstimos
+        self.borrowed_list.clear()
+        if borrowed_items:
+            for item in borrowed_items:
+                item_text = f"Título: {item['titulo']}\nDevolução prevista: {item['data_devolucao_prevista']}"
+                self.borrowed_list.addItem(QListWidgetItem(item_text))
+
+        # Atualiza a lista de resenhas
+        self.reviews_list.clear()
+        if reviews:
+            for review in reviews:
+                item_text = f"Título: {review['titulo']}\nResenha: {review['texto_resenha']}"
+                item = QListWidgetItem(item_text)
+                item.setData(Qt.UserRole, review['material_id'])
+                self.reviews_list.addItem(item)
     
     def remove_review(self):
         selected_item = self.reviews_list.currentItem()
@@ -1023,11 +1325,14 @@ class UserProfileScreen(QWidget):
             material_id = selected_item.data(Qt.UserRole)
             user_id = self.main_app.usuario_logado_id
             
-            if self.biblioteca.remover_resenha(user_id, material_id):
-                QMessageBox.information(self, "Sucesso", "Resenha removida com sucesso!")
-                self.refresh_profile()
-            else:
-                QMessageBox.critical(self, "Erro", "Não foi possível remover a resenha.")
+            self.main_app.executor.executar(self.biblioteca.remover_resenha, user_id, material_id,
+                                            ao_concluir=self.resenha_removida)
+
+    def resenha_removida(self, sucesso):
+        if sucesso:
+            QMessageBox.information(self, "Sucesso", "Resenha removida com sucesso!")
+        else:
+            QMessageBox.critical(self, "Erro", "Não foi possível remover a resenha.")
 
 
 class DebugScreen(QWidget):
@@ -1090,7 +1395,10 @@ class DebugScreen(QWidget):
 
     def refresh_users(self):
         self.table.setRowCount(0)
-        users = self.biblioteca.listar_usuarios()
+        self.main_app.executor.executar(self.biblioteca.listar_usuarios, ao_concluir=self.exibir_usuarios,
+                                        chave='usuarios')
+
+    def exibir_usuarios(self, users):
         if users:
             self.table.setRowCount(len(users))
             for i, user in enumerate(users):
@@ -1113,7 +1421,11 @@ class DebugScreen(QWidget):
         row = selected_rows[0].row()
         user_id = int(self.table.item(row, 0).text())
 
-        if self.biblioteca.atualizar_nome_usuario(user_id, new_name):
+        self.main_app.executor.executar(self.biblioteca.atualizar_nome_usuario, user_id, new_name,
+                                        ao_concluir=self.nome_atualizado)
+
+    def nome_atualizado(self, sucesso):
+        if sucesso:
             QMessageBox.information(self, "Sucesso", "Nome do usuário atualizado com sucesso!")
             self.update_name_input.clear()
             self.refresh_users()
@@ -1132,11 +1444,15 @@ class DebugScreen(QWidget):
         if reply == QMessageBox.Yes:
             row = selected_rows[0].row()
             user_id = int(self.table.item(row, 0).text())
-            if self.biblioteca.remover_usuario(user_id):
-                QMessageBox.information(self, "Sucesso", "Usuário removido com sucesso!")
-                self.refresh_users()
-            else:
-                QMessageBox.critical(self, "Erro", "Não foi possível remover o usuário.")
+            self.main_app.executor.executar(self.biblioteca.remover_usuario, user_id,
+                                            ao_concluir=self.usuario_removido)
+
+    def usuario_removido(self, sucesso):
+        if sucesso:
+            QMessageBox.information(self, "Sucesso", "Usuário removido com sucesso!")
+            self.refresh_users()
+        else:
+            QMessageBox.critical(self, "Erro", "Não foi possível remover o usuário.")
 
 class AppBiblioteca(QWidget):
     # Índices das telas para navegação
@@ -1158,36 +1474,70 @@ class AppBiblioteca(QWidget):
         
         self.biblioteca = Biblioteca(db_name=DB_NAME)
         self.usuario_logado_id = None
+        # Todas as chamadas ao banco feitas pelas telas passam pelo executor
+        self.executor = ExecutorBanco(self.biblioteca, self)
+        self.executor.ocupado.connect(self.indicar_ocupado)
+        # As telas se atualizam pelos eventos das escritas, sem recarregar tudo
+        self.eventos = PonteEventos(self.biblioteca, self)
+        marcar_inicializacao("conexão com o banco")
         
         main_layout = QVBoxLayout()
         self.stacked_widget = QStackedWidget()
-        
-        self.login_screen = LoginScreen(self, self.biblioteca)
-        self.register_screen = RegisterScreen(self, self.biblioteca)
-        self.main_screen = MainScreen(self)
-        self.add_material_screen = AddMaterialScreen(self, self.biblioteca)
-        self.acervo_screen = AcervoScreen(self, self.biblioteca)
-        self.debug_screen = DebugScreen(self, self.biblioteca)
-        self.recommendation_screen = RecommendationScreen(self, self.biblioteca)
-        self.user_profile_screen = UserProfileScreen(self, self.biblioteca)
-        self.reset_password_screen = ResetPasswordScreen(self, self.biblioteca)
-        self.material_details_screen = MaterialDetailsScreen(self, self.biblioteca)
-
-        self.stacked_widget.addWidget(self.login_screen)
-        self.stacked_widget.addWidget(self.register_screen)
-        self.stacked_widget.addWidget(self.main_screen)
-        self.stacked_widget.addWidget(self.add_material_screen)
-        self.stacked_widget.addWidget(self.acervo_screen)
-        self.stacked_widget.addWidget(self.debug_screen)
-        self.stacked_widget.addWidget(self.recommendation_screen)
-        self.stacked_widget.addWidget(self.user_profile_screen)
-        self.stacked_widget.addWidget(self.reset_password_screen)
-        self.stacked_widget.addWidget(self.material_details_screen)
+
+        # Telas construídas na primeira navegação até elas (ver tela()); até lá o índice
+        # do QStackedWidget guarda um widget vazio
+        self._fabricas = {
+            self.LOGIN_INDEX: lambda: LoginScreen(self, self.biblioteca),
+            self.REGISTER_INDEX: lambda: RegisterScreen(self, self.biblioteca),
+            self.MAIN_MENU_INDEX: lambda: MainScreen(self),
+            self.ADD_MATERIAL_INDEX: lambda: AddMaterialScreen(self, self.biblioteca),
+            self.ACERVO_INDEX: lambda: AcervoScreen(self, self.biblioteca),
+            self.DEBUG_INDEX: lambda: DebugScreen(self, self.biblioteca),
+            self.RECOMMENDATION_INDEX: lambda: RecommendationScreen(self, self.biblioteca),
+            self.PROFILE_INDEX: lambda: UserProfileScreen(self, self.biblioteca),
+            self.RESET_PASSWORD_INDEX: lambda: ResetPasswordScreen(self, self.biblioteca),
+            self.MATERIAL_DETAILS_INDEX: lambda: MaterialDetailsScreen(self, self.biblioteca),
+        }
+        self._telas = {}
+        # Com --tempos, cada construção sob demanda é mostrada no terminal
+        self.relatar_tempos = False
+        for _ in self._fabricas:
+            self.stacked_widget.addWidget(QWidget())
+        self.tela(self.LOGIN_INDEX)
         
         main_layout.addWidget(self.stacked_widget)
         self.setLayout(main_layout)
 
+    def tela(self, index):
+        # Devolve a tela do índice, construindo-a na primeira vez
+        if index not in self._telas:
+            inicio = time.perf_counter()
+            tela = self._fabricas[index]()
+            # Trocar o widget vazio mexe no índice atual do QStackedWidget; ele é restaurado
+            atual = self.stacked_widget.currentIndex()
+            vazio = self.stacked_widget.widget(index)
+            self.stacked_widget.removeWidget(vazio)
+            vazio.deleteLater()
+            self.stacked_widget.insertWidget(index, tela)
+            self.stacked_widget.setCurrentIndex(atual)
+            self._telas[index] = tela
+            if self.relatar_tempos:
+                print(f"Tela {type(tela).__name__} construída em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        return self._telas[index]
+
+    login_screen = property(lambda self: self.tela(self.LOGIN_INDEX))
+    register_screen = property(lambda self: self.tela(self.REGISTER_INDEX))
+    main_screen = property(lambda self: self.tela(self.MAIN_MENU_INDEX))
+    add_material_screen = property(lambda self: self.tela(self.ADD_MATERIAL_INDEX))
+    acervo_screen = property(lambda self: self.tela(self.ACERVO_INDEX))
+    debug_screen = property(lambda self: self.tela(self.DEBUG_INDEX))
+    recommendation_screen = property(lambda self: self.tela(self.RECOMMENDATION_INDEX))
+    user_profile_screen = property(lambda self: self.tela(self.PROFILE_INDEX))
+    reset_password_screen = property(lambda self: self.tela(self.RESET_PASSWORD_INDEX))
+    material_details_screen = property(lambda self: self.tela(self.MATERIAL_DETAILS_INDEX))
+
     def switch_to_screen(self, index):
+        self.tela(index)
         self.stacked_widget.setCurrentIndex(index)
         if index == self.ACERVO_INDEX:
             self.acervo_screen.refresh_acervo()
@@ -1198,19 +1548,44 @@ class AppBiblioteca(QWidget):
         elif index == self.PROFILE_INDEX:
             self.user_profile_screen.refresh_profile()
     
+    def indicar_ocupado(self, ocupado):
+        # Cursor de "trabalhando em segundo plano" enquanto houver tarefas no executor;
+        # a janela continua respondendo
+        if ocupado:
+            QApplication.setOverrideCursor(QCursor(Qt.BusyCursor))
+        else:
+            QApplication.restoreOverrideCursor()
+
+    def closeEvent(self, event):
+        self.eventos.desligar()
+        self.executor.encerrar()
+        self.biblioteca.close()
+        super().closeEvent(event)
+
     def logout(self):
         self.usuario_logado_id = None
         QMessageBox.information(self, "Logout", "Você foi desconectado.")
         self.switch_to_screen(self.LOGIN_INDEX)
 
 if __name__ == "__main__":
-    if os.path.exists(DB_NAME):
-        os.remove(DB_NAME)
-        print(f"Banco de dados '{DB_NAME}' limpo.")
-
-    criar_tabelas() 
+    # Uso: python gui.py [--tempos]
+    marcar_inicializacao("importações")
+    # Aplica apenas as migrações pendentes; com o banco em dia só lê o user_version
+    criar_tabelas(DB_NAME)
+    marcar_inicializacao("migrações")
     
     app = QApplication(sys.argv)
+    marcar_inicializacao("QApplication")
     main_window = AppBiblioteca()
+    marcar_inicializacao("janela e tela de login")
     main_window.show()
+    if '--tempos' in sys.argv:
+        main_window.relatar_tempos = True
+
+        def relatar():
+            # Primeira volta do laço de eventos: a janela já foi desenhada
+            marcar_inicializacao("primeira exibição")
+            print(relatorio_inicializacao(), flush=True)
+
+        QTimer.singleShot(0, relatar)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,175 @@
+import csv
+import json
+import sys
+import time
+from Biblioteca import Biblioteca
+from MaterialBibliografico import Livro, Apostila, Ebook, Revista, Resenha, Trabalho
+
+# categoria -> (classe, campos específicos na ordem do construtor)
+CATEGORIAS = {
+    'livro': (Livro, ('genero', 'movimento', 'editora')),
+    'apostila': (Apostila, ('turma', 'disciplina')),
+    'ebook': (Ebook, ('genero', 'movimento', 'url')),
+    'revista': (Revista, ('editora',)),
+    'resenha': (Resenha, ()),
+    'trabalho': (Trabalho, ()),
+}
+
+CAMPOS_OBRIGATORIOS = ('categoria', 'usuario_id', 'autor', 'titulo', 'ano')
+
+
+class LinhaInvalida(Exception):
+    pass
+
+
+def ler_linhas(caminho):
+    # Gera (número da linha, registro) sem carregar o arquivo inteiro na memória.
+    # Linhas JSONL malformadas são geradas como LinhaInvalida para irem aos rejeitados.
+    if caminho.endswith('.jsonl'):
+        with open(caminho, encoding='utf-8') as arquivo:
+            for numero, texto in enumerate(arquivo, start=1):
+                if not texto.strip():
+                    continue
+                try:
+                    registro = json.loads(texto)
+                except json.JSONDecodeError as e:
+                    yield numero, LinhaInvalida(f"JSON inválido: {e}"), texto.rstrip('\n')
+                    continue
+                yield numero, registro, registro
+    elif caminho.endswith('.csv'):
+        with open(caminho, encoding='utf-8', newline='') as arquivo:
+            # O cabeçalho é a linha 1
+            for numero, registro in enumerate(csv.DictReader(arquivo), start=2):
+                yield numero, registro, registro
+    else:
+        raise ValueError("Formato não suportado: use .csv ou .jsonl")
+
+
+def _texto(registro, campo, obrigatorio=True):
+    valor = registro.get(campo)
+    if isinstance(valor, str):
+        valor = valor.strip()
+    if valor in (None, ''):
+        if obrigatorio:
+            raise LinhaInvalida(f"campo '{campo}' vazio")
+        return None
+    return str(valor)
+
+
+def _inteiro(registro, campo):
+    valor = _texto(registro, campo)
+    try:
+        return int(valor)
+    except ValueError:
+        raise LinhaInvalida(f"campo '{campo}' não é um número inteiro: {valor!r}")
+
+
+def converter_registro(registro, usuario_existe):
+    # Valida o registro e monta a subclasse de MaterialBibliografico correspondente
+    if not isinstance(registro, dict):
+        raise LinhaInvalida("registro não é um objeto")
+    faltando = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in registro]
+    if faltando:
+        raise LinhaInvalida(f"campos ausentes: {', '.join(faltando)}")
+
+    categoria = _texto(registro, 'categoria').lower()
+    if categoria not in CATEGORIAS:
+        raise LinhaInvalida(f"categoria desconhecida: {categoria!r}")
+    classe, campos_especificos = CATEGORIAS[categoria]
+
+    usuario_id = _inteiro(registro, 'usuario_id')
+    if not usuario_existe(usuario_id):
+        raise LinhaInvalida(f"usuário {usuario_id} não existe")
+
+    ano = _inteiro(registro, 'ano')
+    if not 0 < ano <= 9999:
+        raise LinhaInvalida(f"ano fora do intervalo: {ano}")
+
+    especificos = [_texto(registro, campo, obrigatorio=False) for campo in campos_especificos]
+    return classe(usuario_id, _texto(registro, 'autor'), _texto(registro, 'titulo'), ano, *especificos)
+
+
+def importar_catalogo(biblioteca, caminho, tamanho_lote=5000, caminho_rejeitados=None):
+    # Importa o arquivo em transações de tamanho_lote materiais. Linhas inválidas vão para
+    # caminho_rejeitados (JSONL com linha, erro e registro original) sem interromper a importação.
+    if caminho_rejeitados is None:
+        caminho_rejeitados = caminho + '.rejeitados.jsonl'
+
+    usuarios = {}
+
+    def usuario_existe(usuario_id):
+        # Cache por id: cresce com o número de usuários, não com o tamanho do arquivo
+        if usuario_id not in usuarios:
+            usuarios[usuario_id] = biblioteca.buscar_usuario(usuario_id) is not None
+        return usuarios[usuario_id]
+
+    resumo = {'lidas': 0, 'importadas': 0, 'rejeitadas': 0}
+    inicio = time.perf_counter()
+
+    rejeitados = None
+
+    def rejeitar(numero, erro, original):
+        # O arquivo só é criado na primeira linha rejeitada
+        nonlocal rejeitados
+        if rejeitados is None:
+            rejeitados = open(caminho_rejeitados, 'w', encoding='utf-8')
+        rejeitados.write(json.dumps({'linha': numero, 'erro': str(erro), 'registro': original},
+                                    ensure_ascii=False) + '\n')
+        resumo['rejeitadas'] += 1
+
+    def gravar(lote):
+        if biblioteca.adicionar_materiais_lote([material for _, material, _ in lote]) is not None:
+            resumo['importadas'] += len(lote)
+        else:
+            # O lote inteiro foi desfeito; regrava linha a linha para isolar as que falham
+            for numero, material, original in lote:
+                if biblioteca.adicionar_materiais_lote([material]) is not None:
+                    resumo['importadas'] += 1
+                else:
+                    rejeitar(numero, "erro ao gravar no banco", original)
+        duracao = time.perf_counter() - inicio
+        print(f"{resumo['lidas']} linhas lidas, {resumo['importadas']} importadas, "
+              f"{resumo['rejeitadas']} rejeitadas ({resumo['lidas'] / duracao:.0f} linhas/s)")
+
+    try:
+        lote = []
+        for numero, registro, original in ler_linhas(caminho):
+            resumo['lidas'] += 1
+            try:
+                if isinstance(registro, LinhaInvalida):
+                    raise registro
+                lote.append((numero, converter_registro(registro, usuario_existe), original))
+            except LinhaInvalida as e:
+                rejeitar(numero, e, original)
+                continue
+            if len(lote) >= tamanho_lote:
+                gravar(lote)
+                lote = []
+        if lote:
+            gravar(lote)
+    finally:
+        if rejeitados is not None:
+            rejeitados.close()
+
+    resumo['segundos'] = time.perf_counter() - inicio
+    return resumo
+
+
+if __name__ == "__main__":
+    # Uso: python importador.py arquivo.(csv|jsonl) [arquivo.db] [tamanho_lote]
+    if len(sys.argv) < 2:
+        print("Uso: python importador.py arquivo.(csv|jsonl) [arquivo.db] [tamanho_lote]")
+        sys.exit(2)
+    caminho = sys.argv[1]
+    db_name = sys.argv[2] if len(sys.argv) > 2 else 'Biblioteca.db'
+    tamanho_lote = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+
+    biblioteca = Biblioteca(db_name, perfil='batch-import')
+    resumo = importar_catalogo(biblioteca, caminho, tamanho_lote)
+    biblioteca.close()
+
+    print(f"Importação concluída: {resumo['importadas']} de {resumo['lidas']} linhas "
+          f"em {resumo['segundos']:.2f}s.")
+    if resumo['rejeitadas']:
+        print(f"{resumo['rejeitadas']} linha(s) rejeitada(s) em {caminho}.rejeitados.jsonl")
+        sys.exit(1)
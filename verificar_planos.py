@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import tempfile
+import contextlib
+import io
+import types
+import json
+import base64
+from Biblioteca import Biblioteca
+from MaterialBibliografico import Livro
+from dados import criar_tabelas
+from benchmark import popular_acervo
+
+# Tabelas que crescem com o uso; uma varredura completa delas é considerada regressão
+TABELAS_GRANDES = {
+    'usuario', 'material_bibliografico', 'livro', 'apostila', 'ebook', 'revista',
+    'emprestimo', 'reserva', 'avaliacao', 'resenha', 'acesso_ebook', 'favorita', 'amizade',
+}
+
+# Métodos que listam uma tabela inteira por definição (a varredura é esperada)
+LISTAGENS_COMPLETAS = {
+    'listar_acervo', 'listar_acervo_com_status', 'verificar_status_materiais', 'listar_usuarios',
+    'iterar_acervo', 'iterar_usuarios',
+}
+
+# Métodos públicos da Biblioteca que não executam consultas próprias
+METODOS_IGNORADOS = {'close', 'execute_query', 'transacao', 'conexao', 'liberar_conexao', 'verificar_perfil',
+                     'metricas_conexoes', 'rastrear_consultas'}
+
+PALAVRAS_RESERVADAS = {
+    'WHERE', 'LEFT', 'JOIN', 'INNER', 'ON', 'GROUP', 'ORDER', 'LIMIT', 'USING', 'SET', 'VALUES',
+}
+
+
+def _token(*chave):
+    # Token de continuação no formato de Biblioteca._paginar, para exercitar a página seguinte
+    return base64.urlsafe_b64encode(json.dumps(list(chave)).encode()).decode()
+
+
+def chamadas_biblioteca(biblioteca):
+    # (método, argumentos) para cada método público; a ordem importa (ex.: devolução após empréstimo)
+    return [
+        ('cadastrar_usuario', ("Plano", "plano@email.com", "senha")),
+        ('login_usuario', ("plano@email.com", "senha")),
+        ('resetar_senha', ("plano@email.com", "nova")),
+        ('buscar_usuario', (1,)),
+        ('atualizar_usuario', (1, "Novo Nome")),
+        ('atualizar_nome_usuario', (1, "Outro Nome")),
+        ('listar_usuarios', ()),
+        ('iterar_usuarios', ()),
+        ('paginar_usuarios', (10, _token("Usuário 1", 2))),
+        ('adicionar_material', (Livro(1, "Autor", "Título", 2000, "gênero", "movimento", "editora"),)),
+        ('adicionar_materiais_lote', ([Livro(1, "Autor", "Título lote", 2000, "gênero", "movimento", "editora")],)),
+        ('listar_acervo', ()),
+        ('iterar_acervo', ()),
+        ('paginar_acervo', ('livro', 10, _token(100))),
+        ('listar_acervo_com_status', ()),
+        ('paginar_acervo_com_status', (None, 'titulo', False, 10)),
+        ('paginar_acervo_com_status', ("Título", 'autor', True, 10, _token("autor 5", 5))),
+        ('verificar_status_material', (1,)),
+        ('verificar_status_materiais', ()),
+        ('buscar_material_por_id', (1,)),
+        ('buscar_materiais_por_ids', ([1, 2, 3, 999],)),
+        ('buscar_materiais_titulo', ("Título 1",)),
+        ('buscar_materiais_autor', ("Autor 1",)),
+        ('buscar_materiais', ("Título",)),
+        ('adicionar_amigo', (1, 2)),
+        ('listar_amigos', (1,)),
+        ('iterar_amigos', (1,)),
+        ('remover_amigo', (1, 2)),
+        ('registrar_emprestimo', (1, 1, "2030-01-01 00:00:00")),
+        ('buscar_emprestimo_aberto', (1, 1)),
+        ('buscar_emprestimo_aberto_material', (1,)),
+        ('registrar_devolucao', (1,)),
+        ('listar_emprestimos_usuario', (1,)),
+        ('iterar_emprestimos_usuario', (1,)),
+        ('paginar_emprestimos_usuario', (1, 10, _token("2030-01-01 00:00:00", 5))),
+        ('registrar_acesso_ebook', (1, 3, 10)),
+        ('listar_acessos_ebook_usuario', (1,)),
+        ('iterar_acessos_ebook_usuario', (1,)),
+        ('adicionar_favorito', (1, 1)),
+        ('listar_favoritos_usuario', (1,)),
+        ('iterar_favoritos_usuario', (1,)),
+        ('remover_favorito', (1, 1)),
+        ('escrever_resenha', (1, 1, "Resenha")),
+        ('editar_resenha', (1, 1, "Resenha editada")),
+        ('listar_resenhas_material', (1,)),
+        ('iterar_resenhas_material', (1,)),
+        ('paginar_resenhas_material', (1, 10, _token("2030-01-01 00:00:00", 5))),
+        ('listar_resenhas_usuario', (1,)),
+        ('iterar_resenhas_usuario', (1,)),
+        ('remover_resenha', (1, 1)),
+        ('avaliar_material', (4, 1, 4.0)),
+        ('atualizar_avaliacao', (4, 1, 3.0)),
+        ('calcular_nota_media_material', (1,)),
+        ('remover_avaliacao', (4, 1)),
+        ('fazer_reserva', (1, 2)),
+        ('listar_reservas_usuario', (1,)),
+        ('iterar_reservas_usuario', (1,)),
+        ('cancelar_reserva', (1,)),
+        ('recomendar_por_genero', (1,)),
+        ('remover_material', (2,)),
+        ('remover_usuario', (3,)),
+    ]
+
+
+def _tabelas_por_apelido(sql):
+    apelidos = {}
+    for tabela, apelido in re.findall(r'(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        apelidos[tabela] = tabela
+        if apelido and apelido.upper() not in PALAVRAS_RESERVADAS:
+            apelidos[apelido] = tabela
+    return apelidos
+
+
+def _pagina_pelo_indice(sql, detalhe, detalhes):
+    # Primeira página de uma listagem ordenada: com LIMIT e sem ordenação temporária, a
+    # varredura segue o índice do ORDER BY e para na página pedida. Só vale sem filtro na
+    # tabela varrida; com filtro ela pode percorrer a tabela inteira até completar a página.
+    indice = re.match(r'SCAN (\w+) USING (?:COVERING )?INDEX \w+', detalhe)
+    if not indice or not re.search(r'\bLIMIT\b', sql, re.IGNORECASE):
+        return False
+    if any('TEMP B-TREE' in outro for outro in detalhes):
+        return False
+    filtros = re.findall(r'\bWHERE\b(.*?)(?=\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)', sql,
+                         re.IGNORECASE | re.DOTALL)
+    return not any(re.search(rf'\b{indice.group(1)}\.', filtro) for filtro in filtros)
+
+
+def _problemas_do_plano(conn, sql):
+    apelidos = _tabelas_por_apelido(sql)
+    detalhes = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    problemas = []
+    for detalhe in detalhes:
+        if 'AUTOMATIC' in detalhe:
+            problemas.append(detalhe)
+            continue
+        varredura = re.match(r'SCAN (\w+)', detalhe)
+        if varredura and _pagina_pelo_indice(sql, detalhe, detalhes):
+            continue
+        if varredura and apelidos.get(varredura.group(1)) in TABELAS_GRANDES:
+            problemas.append(detalhe)
+    return problemas
+
+
+def _indices_de_chaves_estrangeiras(conn):
+    # Toda coluna filha de FK precisa ser a primeira coluna de algum índice (ou da chave primária)
+    problemas = []
+    tabelas = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE 'CREATE VIRTUAL%'")]
+    for tabela in tabelas:
+        primeiras_colunas = set()
+        for indice in conn.execute(f"PRAGMA index_list({tabela})"):
+            colunas = list(conn.execute(f"PRAGMA index_info({indice[1]})"))
+            if colunas:
+                primeiras_colunas.add(colunas[0][2])
+        for coluna in conn.execute(f"PRAGMA table_info({tabela})"):
+            if coluna[5] == 1:
+                primeiras_colunas.add(coluna[1])
+        for fk in conn.execute(f"PRAGMA foreign_key_list({tabela})"):
+            if fk[3] not in primeiras_colunas:
+                problemas.append(f"{tabela}.{fk[3]} (FK para {fk[2]}) sem índice")
+    return problemas
+
+
+def verificar_planos():
+    falhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        db_name = os.path.join(pasta, 'planos.db')
+        criar_tabelas(db_name)
+        popular_acervo(db_name, 200)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            biblioteca = Biblioteca(db_name)
+
+        chamadas = chamadas_biblioteca(biblioteca)
+        cobertos = {metodo for metodo, _ in chamadas}
+        publicos = {nome for nome in dir(Biblioteca)
+                    if not nome.startswith('_') and callable(getattr(Biblioteca, nome))}
+        for metodo in sorted(publicos - cobertos - METODOS_IGNORADOS):
+            falhas.append((metodo, "método sem chamada em chamadas_biblioteca()", ""))
+
+        for metodo, args in chamadas:
+            consultas = []
+            biblioteca.rastrear_consultas(consultas.append)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    resultado = getattr(biblioteca, metodo)(*args)
+                    # Os métodos iterar_* só consultam o banco quando consumidos
+                    if isinstance(resultado, types.GeneratorType):
+                        list(resultado)
+            finally:
+                biblioteca.rastrear_consultas(None)
+
+            with biblioteca.conexao():
+                for sql in consultas:
+                    # Instruções internas dos gatilhos aparecem como comentários no trace
+                    if not re.match(r'\s*(SELECT|UPDATE|DELETE|WITH)', sql, re.IGNORECASE):
+                        continue
+                    for detalhe in _problemas_do_plano(biblioteca.conn, sql):
+                        if metodo in LISTAGENS_COMPLETAS and detalhe.startswith('SCAN'):
+                            continue
+                        falhas.append((metodo, detalhe, ' '.join(sql.split())))
+
+        with biblioteca.conexao():
+            for problema in _indices_de_chaves_estrangeiras(biblioteca.conn):
+                falhas.append(('chaves estrangeiras', problema, ""))
+        biblioteca.close()
+    return falhas
+
+
+if __name__ == "__main__":
+    falhas = verificar_planos()
+    if falhas:
+        print(f"{len(falhas)} problema(s) de plano de consulta:")
+        for metodo, detalhe, sql in falhas:
+            print(f" - {metodo}: {detalhe}")
+            if sql:
+                print(f"     {sql[:200]}")
+        sys.exit(1)
+    print("Nenhuma varredura completa de tabela grande encontrada.")